@@ -0,0 +1,83 @@
+"""
+checks apply_angles (computed and table lookup) against the scalar apply_angle,
+then compares their throughput for steering a crowd of agents
+
+run from the repo root: python -m benchmarks.angle_bench
+"""
+import random
+import time
+
+import numpy as np
+
+from misc.angleutil import Angle, apply_angle, apply_angles
+
+COUNT = 100_000
+REPEATS = 5
+
+
+def per_point_ns(func, count):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best / count * 1e9
+
+
+def check(positions, angles, dists):
+    expected = np.array([apply_angle(a, d, p) for p, a, d in zip(positions.tolist(), angles.tolist(), dists.tolist())])
+    assert np.allclose(apply_angles(positions, angles, dists), expected, rtol=0, atol=1e-9)
+
+    angle = Angle()
+    whole = []
+    for a in np.rint(angles).astype(int).tolist():
+        angle.rotate(a)
+        whole.append(angle.angle)
+    whole = np.array(whole, dtype=float)
+    expected = np.array([apply_angle(a, d, p) for p, a, d in zip(positions.tolist(), whole.tolist(), dists.tolist())])
+    assert np.array_equal(apply_angles(positions, whole, dists, use_table=True), expected)
+    for out_of_range in (whole + 361, whole - 361):
+        try:
+            apply_angles(positions, out_of_range, dists, use_table=True)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('use_table accepted angles outside 0 - 361')
+
+    # Angle keeps angles in [0, 361), the top of that range rounds to the last table entry
+    for fractional in (360.5, 360.7, 360.99, .2):
+        angle.rotate(fractional)
+        expected = apply_angle(round(angle.angle), 3, (1, 2))
+        assert apply_angles([(1, 2)], angle.angle, 3, use_table=True)[0].tolist() == list(expected)
+
+    angle.rotate(45)
+    assert apply_angles([(1, 2)], angle.angle, 3)[0].tolist() == list(angle.apply_to((1, 2), 3))
+
+
+def main():
+    rng = random.Random(0)
+    positions = np.array([(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(COUNT)])
+    angles = np.array([rng.uniform(0, 720) for _ in range(COUNT)])
+    dists = np.array([rng.uniform(0, 5) for _ in range(COUNT)])
+    whole = np.rint(angles) % 361
+
+    check(positions[:2000], angles[:2000], dists[:2000])
+    print('apply_angles matches apply_angle')
+
+    pos_list, angle_list, dist_list = positions.tolist(), whole.tolist(), dists.tolist()
+    out = np.empty_like(positions)
+    results = {
+        'apply_angle loop': per_point_ns(
+            lambda: [apply_angle(a, d, p) for p, a, d in zip(pos_list, angle_list, dist_list)], COUNT),
+        'apply_angles': per_point_ns(lambda: apply_angles(positions, whole, dists, out=out), COUNT),
+        'apply_angles table': per_point_ns(lambda: apply_angles(positions, whole, dists, True, out=out), COUNT),
+    }
+
+    baseline = results['apply_angle loop']
+    print(f'{COUNT} agents, whole degree angles')
+    for name, ns in results.items():
+        print(f'{name:>20} {ns:>10.1f} ns/agent {baseline / ns:>10.1f}x')
+
+
+if __name__ == '__main__':
+    main()
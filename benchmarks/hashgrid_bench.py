@@ -0,0 +1,200 @@
+"""
+headless benchmark for the hash grids, drives the ants scenario without arcade or a display
+
+run from the repo root, for example:
+    python -m benchmarks.hashgrid_bench --ants 5000 20000 --bucket-sizes 10 25 --radii 25 100
+"""
+import argparse
+import itertools
+import time
+import tracemalloc
+
+import numpy as np
+
+from examples.arcade_examples.ants.antstore import AntStore
+from misc.hashgrid import ArrayHashGrid, HashGrid, MultiLevelHashGrid, _ray_box_entry
+
+WORLD_WIDTH = 800
+WORLD_HEIGHT = 600
+
+GRIDS = {
+    'hash': lambda bucket_size: HashGrid(bucket_size),
+    'array': lambda bucket_size: ArrayHashGrid(bucket_size, id_dtype=np.int64),
+    'multi': lambda bucket_size: MultiLevelHashGrid(bucket_size),
+}
+
+
+def move_ballistic(ants, rng, dt):
+    ants.step(dt)
+
+
+def move_jitter(ants, rng, dt):
+    ants.positions += rng.uniform(-1, 1, ants.positions.shape)
+
+
+def move_teleport(ants, rng, dt):
+    moved = rng.random(len(ants)) < .05
+    ants.positions[moved] = rng.uniform((0, 0), (WORLD_WIDTH, WORLD_HEIGHT), (int(moved.sum()), 2))
+
+
+MOVEMENTS = {
+    'ballistic': move_ballistic,
+    'jitter': move_jitter,
+    'teleport': move_teleport,
+}
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def check_raycast(seed, count=500, rays=2000, bucket_size=10):
+    """
+    raycast of every grid against a brute force slab test, with boxes and rays on both sides of 0
+    so the cell assignment of negative coordinates is covered
+    """
+    rng = np.random.default_rng(seed)
+    mins = rng.uniform(-100, 100, (count, 2))
+    maxs = mins + rng.uniform(.1, 3, (count, 2))
+    boxes = [(*lo, *hi) for lo, hi in zip(mins.tolist(), maxs.tolist())]
+    grids = {name: make(bucket_size) for name, make in GRIDS.items()}
+    for grid in grids.values():
+        for i, lo, hi in zip(range(count), mins.tolist(), maxs.tolist()):
+            grid.add(i, (lo, hi))
+
+    origins = rng.uniform(-110, 110, (rays, 2)).tolist()
+    angles = rng.uniform(0, 2 * np.pi, rays)
+    directions = np.stack((np.cos(angles), np.sin(angles)), axis=1)
+    # a quarter of the rays are axis aligned, the parallel case of the slab test
+    directions[::4] = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])[rng.integers(0, 4, len(directions[::4]))]
+    for origin, direction in zip(origins, directions.tolist()):
+        expected = set()
+        for i, box in enumerate(boxes):
+            dist = _ray_box_entry(box, *origin, *direction)
+            if dist is not None and dist <= 50:
+                expected.add(i)
+        for name, grid in grids.items():
+            got = {obj for obj, _ in grid.raycast(origin, direction, 50)}
+            assert got == expected, f'{name} raycast from {origin} along {direction}: {got ^ expected}'
+
+
+def check_query_many(seed, count=500, queries=200, bucket_size=10):
+    """
+    ArrayHashGrid.query_many against HashGrid.query_many for small boxes, plus boxes far larger than the occupied
+    area that have to go through the occupied cell filter instead of enumerating every cell they cover
+    """
+    rng = np.random.default_rng(seed)
+    mins = rng.uniform(-100, 100, (count, 2))
+    maxs = mins + rng.uniform(.1, 3, (count, 2))
+    hash_grid, array_grid = HashGrid(bucket_size), ArrayHashGrid(bucket_size, id_dtype=np.int64)
+    for i, lo, hi in zip(range(count), mins.tolist(), maxs.tolist()):
+        hash_grid.add(i, (lo, hi))
+        array_grid.add(i, (lo, hi))
+
+    lows = rng.uniform(-110, 110, (queries, 2))
+    small = np.stack((lows, lows + rng.uniform(0, 40, (queries, 2))), axis=1)
+    ids, offsets = array_grid.query_many(small)
+    expected_ids, expected_offsets = hash_grid.query_many(small)
+    for i in range(queries):
+        got = set(ids[offsets[i]:offsets[i + 1]].tolist())
+        assert got == set(expected_ids[expected_offsets[i]:expected_offsets[i + 1]].tolist()), f'query_many box {i}'
+
+    huge = np.array([[(-1e5, -1e5), (1e5, 1e5)], [(-1e5, -1e5), (0, 1e5)]])
+    ids, offsets = array_grid.query_many(np.concatenate((huge, small[:5])))
+    assert set(ids[offsets[0]:offsets[1]].tolist()) == set(range(count)), 'query_many box covering everything'
+    left = set(np.flatnonzero(mins[:, 0].astype(np.int64) // bucket_size <= 0).tolist())
+    assert set(ids[offsets[1]:offsets[2]].tolist()) == left, 'query_many box covering the left half'
+
+
+def run_scenario(grid_name, ant_count, bucket_size, radius, movement, frames, queries, seed):
+    rng = np.random.default_rng(seed)
+    ants = AntStore(ant_count, WORLD_WIDTH, WORLD_HEIGHT, rng)
+    ids = ants.ids.tolist()
+
+    mins, maxs = ants.mins.tolist(), ants.maxs.tolist()
+
+    def fill():
+        grid = GRIDS[grid_name](bucket_size)
+        for i, lo, hi in zip(ids, mins, maxs):
+            grid.add(i, (lo, hi))
+        if isinstance(grid, ArrayHashGrid):
+            grid.build_index()
+        return grid
+
+    # tracemalloc slows allocation down a lot, so memory is measured on a separate fill
+    tracemalloc.start()
+    fill()
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    grid = fill()
+    insert = time.perf_counter() - start
+
+    rebuild = update = 0.0
+    for _ in range(frames):
+        MOVEMENTS[movement](ants, rng, 1 / 60)
+        mins, maxs = ants.mins, ants.maxs
+        update += timed(lambda: [grid.update(i, (lo, hi)) for i, lo, hi in zip(ids, mins.tolist(), maxs.tolist())])
+        # array grid updates only mark the index stale, building it is part of the cost before the grid is queryable
+        if isinstance(grid, ArrayHashGrid):
+            update += timed(grid.build_index)
+        rebuild += timed(lambda: grid.rebuild(ants.ids, mins, maxs))
+        if isinstance(grid, ArrayHashGrid):
+            rebuild += timed(grid.build_index)
+
+    centers = rng.uniform((0, 0), (WORLD_WIDTH, WORLD_HEIGHT), (queries, 2)).tolist()
+    query = timed(lambda: [grid.query_radius(center, radius) for center in centers])
+
+    return {
+        'grid': grid_name,
+        'ants': ant_count,
+        'bucket': bucket_size,
+        'radius': radius,
+        'movement': movement,
+        'insert/s': ant_count / insert,
+        'update/s': ant_count * frames / update,
+        'rebuild ms': rebuild / frames * 1000,
+        'query/s': queries / query,
+        'peak MiB': memory / 2 ** 20,
+    }
+
+
+def print_rows(rows):
+    columns = list(rows[0])
+    cells = [[f'{value:,.2f}' if isinstance(value, float) else str(value) for value in row.values()] for row in rows]
+    widths = [max(len(column), *(len(row[i]) for row in cells)) for i, column in enumerate(columns)]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in cells:
+        print('  '.join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grids', nargs='+', default=list(GRIDS), choices=list(GRIDS))
+    parser.add_argument('--ants', nargs='+', type=int, default=[5000])
+    parser.add_argument('--bucket-sizes', nargs='+', type=int, default=[10, 25])
+    parser.add_argument('--radii', nargs='+', type=float, default=[50])
+    parser.add_argument('--movements', nargs='+', default=['ballistic'], choices=list(MOVEMENTS))
+    parser.add_argument('--frames', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    check_raycast(args.seed)
+    print('raycast matches brute force for every grid')
+    check_query_many(args.seed)
+    print('ArrayHashGrid.query_many matches HashGrid, including boxes larger than the occupied area')
+
+    rows = [
+        run_scenario(grid, ants, bucket_size, radius, movement, args.frames, args.queries, args.seed)
+        for ants, bucket_size, radius, movement, grid
+        in itertools.product(args.ants, args.bucket_sizes, args.radii, args.movements, args.grids)
+    ]
+    print_rows(rows)
+
+
+if __name__ == '__main__':
+    main()
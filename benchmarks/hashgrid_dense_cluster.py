@@ -0,0 +1,51 @@
+"""
+times remove/update against clusters where every object shares the same few buckets,
+per operation cost should stay flat as the cluster grows
+
+run from the repo root: python -m benchmarks.hashgrid_dense_cluster
+"""
+import dataclasses
+import time
+
+from misc.hashgrid import HashGrid
+
+CLUSTER_SIZES = (1_000, 2_000, 4_000, 8_000, 16_000)
+
+
+@dataclasses.dataclass(unsafe_hash=True)
+class Item:
+    id: int
+    x: float = dataclasses.field(hash=False)
+    y: float = dataclasses.field(hash=False)
+
+    @property
+    def bounds(self):
+        return (self.x, self.y), (self.x + 15, self.y + 15)
+
+
+def fill(size):
+    grid = HashGrid(20)
+    items = [Item(i, i % 5, i % 3) for i in range(size)]
+    for item in items:
+        grid.add(item, item.bounds)
+    return grid, items
+
+
+def time_per_op(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    print(f'{"objects":>8} {"update us/op":>14} {"remove us/op":>14}')
+    for size in CLUSTER_SIZES:
+        grid, items = fill(size)
+        update = time_per_op(lambda item: grid.update(item, ((item.x + 10, item.y), (item.x + 25, item.y + 15))), items)
+        remove = time_per_op(grid.remove, items)
+        print(f'{size:>8} {update:>14.2f} {remove:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
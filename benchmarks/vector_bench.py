@@ -0,0 +1,71 @@
+"""
+compares Vector (ndarray subclass), FastVector (slotted floats) and VectorArray (one (N, 2) array)
+on a stream of random float coordinates like mouse / bounds math produces
+
+run from the repo root: python -m benchmarks.vector_bench
+"""
+import random
+import time
+
+import numpy as np
+
+from misc.vector import FastVector, Vector, VectorArray, vector_cache
+
+COUNT = 20_000
+
+
+def per_vector_us(func, count):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def scalar_ops(cls, coords, offset):
+    for x, y in coords:
+        v = cls(x, y)
+        v = v + offset
+        v.length
+        v.normalized
+        v.is_near(offset)
+        v.abs_diff(offset)
+
+
+def main():
+    rng = random.Random(0)
+    coords = [(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(COUNT)]
+    array = np.array(coords)
+
+    results = {
+        'Vector': per_vector_us(lambda: scalar_ops(Vector, coords, Vector(3.5, 2.5)), COUNT),
+        'FastVector': per_vector_us(lambda: scalar_ops(FastVector, coords, FastVector(3.5, 2.5)), COUNT),
+    }
+
+    def batch_ops():
+        v = VectorArray(array) + (3.5, 2.5)
+        v.length
+        v.normalized
+        v.is_near((3.5, 2.5))
+        v.abs_diff((3.5, 2.5))
+
+    results['VectorArray'] = per_vector_us(batch_ops, COUNT)
+
+    baseline = results['Vector']
+    print(f'{COUNT} vectors: create, add, length, normalized, is_near, abs_diff')
+    for name, us in results.items():
+        print(f'{name:>12} {us:>10.3f} us/vector {baseline / us:>10.1f}x')
+
+    grid_coords = [(rng.randrange(0, 800, 50), rng.randrange(0, 600, 50)) for _ in range(COUNT)]
+    print(f'\nVector creation with interning, {COUNT} vectors')
+    for stream_name, stream in (('float stream', coords), ('grid aligned', grid_coords)):
+        for settings in (dict(enabled=False), dict(enabled=True, capacity=100), dict(enabled=True, capacity=1000)):
+            vector_cache.clear()
+            vector_cache.reset_stats()
+            vector_cache.configure(**settings)
+            us = per_vector_us(lambda: [Vector(x, y) for x, y in stream], COUNT)
+            label = 'off' if not vector_cache.enabled else f'capacity {vector_cache.capacity}'
+            print(f'{stream_name:>14} {label:>14} {us:>8.3f} us/vector  hit rate {vector_cache.hit_rate:.2f}')
+    vector_cache.configure(enabled=True, capacity=100)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import numpy as np
+
+from misc.aabb import AABBArray
+
+
+def bounce_and_integrate(positions, velocities, delta_time, width, height):
+    """
+    flips the velocity of ants that are outside the world and moving further out, then moves every ant, in place
+    """
+    outside_low = (positions < 0) & (velocities < 0)
+    outside_high = (positions > (width - 1, height - 1)) & (velocities > 0)
+    velocities[outside_low | outside_high] *= -1
+    positions += velocities * delta_time
+
+
+class AntStore:
+    """
+    struct of arrays storage for the ants, every attribute is a single array indexed by ant id,
+    so a simulation step is a handful of array operations instead of a python loop over the ants
+    """
+
+    def __init__(self, count, width, height, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        self.width = width
+        self.height = height
+        self.ids = np.arange(count)
+        self.positions = rng.uniform((0, 0), (width, height), (count, 2))
+        self.previous_positions = self.positions.copy()
+        self.velocities = rng.uniform(-150, 150, (count, 2))
+        self.sizes = rng.integers(1, 11, count).astype(np.float64)
+        self.colors = rng.integers(0, 255, (count, 3))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def step(self, delta_time):
+        """
+        bounces ants that are outside the world and moving further out, then integrates their positions
+        """
+        np.copyto(self.previous_positions, self.positions)
+        bounce_and_integrate(self.positions, self.velocities, delta_time, self.width, self.height)
+
+    def interpolated_positions(self, alpha):
+        """
+        positions [alpha] of the way between the previous and the current step, for drawing between fixed steps
+        """
+        return self.previous_positions + (self.positions - self.previous_positions) * alpha
+
+    @property
+    def mins(self):
+        return self.positions - self.sizes[:, None] / 2
+
+    @property
+    def maxs(self):
+        return self.positions + self.sizes[:, None] / 2
+
+    @property
+    def bounds(self):
+        return AABBArray.from_centers(self.positions, self.sizes)
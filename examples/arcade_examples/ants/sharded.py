@@ -0,0 +1,162 @@
+"""
+ants simulation split across worker processes by vertical strips of the world
+
+every ant array lives in shared memory, each worker owns the ants whose center is in its strip,
+integrates them and keeps an ArrayHashGrid of them, an ant that crosses into another strip is migrated
+by writing the new owner into the shared owner array, which the receiving worker picks up when it reindexes
+
+run headless from the repo root: python -m examples.arcade_examples.ants.sharded 100000
+"""
+import multiprocessing as mp
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from examples.arcade_examples.ants.antstore import AntStore, bounce_and_integrate
+from misc.hashgrid import ArrayHashGrid
+
+
+def _shared_array(shape, dtype, source=None):
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    if source is not None:
+        arr[:] = source
+    return shm, arr
+
+
+def _attach(shm, shape, dtype):
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _strip_of(x, strip_width, shards):
+    return np.clip((x // strip_width).astype(np.int32), 0, shards - 1)
+
+
+def _shard_worker(shard, conn, buffers, count, width, height, shards, bucket_size):
+    positions = _attach(buffers['positions'], (count, 2), np.float64)
+    velocities = _attach(buffers['velocities'], (count, 2), np.float64)
+    half_sizes = _attach(buffers['sizes'], (count,), np.float64)[:, None] / 2
+    owner = _attach(buffers['owner'], (count,), np.int32)
+    strip_width = width / shards
+    grid = ArrayHashGrid(bucket_size, capacity=count // shards + 1, id_dtype=np.int64)
+    owned = np.flatnonzero(owner == shard)
+
+    while True:
+        command, *args = conn.recv()
+        if command == 'step':
+            pos, vel = positions[owned], velocities[owned]
+            bounce_and_integrate(pos, vel, args[0], width, height)
+            positions[owned], velocities[owned] = pos, vel
+            new_owner = _strip_of(pos[:, 0], strip_width, shards)
+            leaving = new_owner != shard
+            owner[owned[leaving]] = new_owner[leaving]
+            conn.send(int(leaving.sum()))
+        elif command == 'index':
+            owned = np.flatnonzero(owner == shard)
+            pos = positions[owned]
+            grid.rebuild(owned, pos - half_sizes[owned], pos + half_sizes[owned])
+            grid.build_index()
+            conn.send(len(owned))
+        elif command == 'query_radius':
+            conn.send(np.fromiter(grid.query_radius(*args), dtype=np.int64))
+        elif command == 'stop':
+            break
+    conn.close()
+
+
+class ShardedAntSim:
+    """
+    same simulation as AntStore.step, run by [shards] worker processes that each own one vertical strip,
+    step() integrates every strip in parallel then migrates and reindexes the ants that changed strips
+    """
+
+    def __init__(self, count, width, height, shards=None, bucket_size=10, rng=None):
+        self.count = count
+        self.width = width
+        self.height = height
+        self.shards = shards or os.cpu_count() or 1
+        self.migrated = 0
+        ants = AntStore(count, width, height, rng)
+        self.colors = ants.colors
+
+        self._buffers = {}
+        self._buffers['positions'], self.positions = _shared_array((count, 2), np.float64, ants.positions)
+        self._buffers['velocities'], self.velocities = _shared_array((count, 2), np.float64, ants.velocities)
+        self._buffers['sizes'], self.sizes = _shared_array((count,), np.float64, ants.sizes)
+        self._buffers['owner'], self.owner = _shared_array(
+            (count,), np.int32, _strip_of(ants.positions[:, 0], width / self.shards, self.shards)
+        )
+        self._max_half_size = float(self.sizes.max(initial=0)) / 2
+
+        self._connections, self._workers = [], []
+        for shard in range(self.shards):
+            parent_conn, child_conn = mp.Pipe()
+            worker = mp.Process(
+                target=_shard_worker,
+                args=(shard, child_conn, self._buffers, count, width, height, self.shards, bucket_size),
+                daemon=True,
+            )
+            worker.start()
+            self._connections.append(parent_conn)
+            self._workers.append(worker)
+        self._broadcast('index')
+
+    def _broadcast(self, *message, shards=None):
+        connections = self._connections if shards is None else [self._connections[i] for i in shards]
+        for conn in connections:
+            conn.send(message)
+        return [conn.recv() for conn in connections]
+
+    def step(self, delta_time):
+        """
+        returns how many ants moved to another strip this step
+        """
+        migrated = sum(self._broadcast('step', delta_time))
+        self._broadcast('index')
+        self.migrated += migrated
+        return migrated
+
+    def query_radius(self, center, r):
+        """
+        returns the ids of the ants within [r] of [center], only the strips the query can reach are asked
+        """
+        reach = r + self._max_half_size
+        strip_width = self.width / self.shards
+        first, last = _strip_of(np.array([center[0] - reach, center[0] + reach]), strip_width, self.shards).tolist()
+        return np.concatenate(self._broadcast('query_radius', center, r, shards=range(first, last + 1)))
+
+    def close(self):
+        if not self._workers:
+            return
+        for conn in self._connections:
+            conn.send(('stop',))
+        for worker in self._workers:
+            worker.join()
+        self._connections, self._workers = [], []
+        self.positions = self.velocities = self.sizes = self.owner = None
+        for shm in self._buffers.values():
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def main(count=100_000, steps=200):
+    with ShardedAntSim(count, 4000, 3000, bucket_size=20) as sim:
+        start = time.perf_counter()
+        for _ in range(steps):
+            sim.step(1 / 60)
+        elapsed = time.perf_counter() - start
+        print(f'{count} ants, {sim.shards} shards: {steps / elapsed:.1f} steps/s, {sim.migrated} migrations')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -1,36 +1,53 @@
+from functools import lru_cache
+
 import numpy as np
 
-a = lambda x, y: np.array((x, y), dtype=int)
+# tip direction of each arm (n, s, e, w) and the two directions its side lines grow in, in the order points are emitted
+_TIPS = np.array(((0, 1), (0, -1), (1, 0), (-1, 0)), dtype=int)
+_SIDE_TIPS = np.repeat(_TIPS, 2, axis=0)
+_SIDE_DIRS = np.array(((-1, 0), (1, 0), (-1, 0), (1, 0), (0, -1), (0, 1), (0, -1), (0, 1)), dtype=int)
 
 
-def create_radius(origin: np.ndarray, expand_range: int, include_origin=False):
-    def make_line(origin: np.ndarray, dir: np.ndarray, times: int):
-        for i in range(1, times + 1):
-            yield origin + (dir * i)
+@lru_cache(maxsize=128)
+def radius_offsets(expand_range: int, include_origin=False):
+    """
+    the (N, 2) int offsets create_radius adds to an origin, cached per radius and read-only
 
-    points = [origin] if include_origin else []
+    same points in the same order as the original point-by-point expansion, duplicates included
+    """
+    chunks = [np.zeros((1, 2), dtype=int)] if include_origin else []
     range_left = expand_range
     allowed_expansion_range = 1
-    n = s = e = w = origin
+    distance = 0
     while range_left > 0:
-        n = n + (0, 1)
-        s = s - (0, 1)
-        e = e + (1, 0)
-        w = w - (1, 0)
-        points.extend((n, s, e, w))
+        distance += 1
+        chunks.append(_TIPS * distance)
         range_left -= 1
         if range_left <= 0:
             break
         current_side_expansion = allowed_expansion_range if range_left - allowed_expansion_range > 0 else range_left
-        points.extend(make_line(n, a(-1, 0), current_side_expansion))
-        points.extend(make_line(n, a(1, 0), current_side_expansion))
-        points.extend(make_line(s, a(-1, 0), current_side_expansion))
-        points.extend(make_line(s, a(1, 0), current_side_expansion))
-        points.extend(make_line(e, a(0, -1), current_side_expansion))
-        points.extend(make_line(e, a(0, 1), current_side_expansion))
-        points.extend(make_line(w, a(0, -1), current_side_expansion))
-        points.extend(make_line(w, a(0, 1), current_side_expansion))
+        steps = np.arange(1, current_side_expansion + 1)
+        # (8 lines, steps, 2): each line starts at its arm's tip and walks [steps] cells sideways
+        lines = _SIDE_TIPS[:, None, :] * distance + _SIDE_DIRS[:, None, :] * steps[None, :, None]
+        chunks.append(lines.reshape(-1, 2))
         range_left -= current_side_expansion
         allowed_expansion_range += 1
 
-    return points
+    offsets = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=int)
+    offsets.flags.writeable = False
+    return offsets
+
+
+def create_radius(origin: np.ndarray, expand_range: int, include_origin=False):
+    """
+    points around [origin] as one (N, 2) int array
+    """
+    return np.asarray(origin, dtype=int) + radius_offsets(expand_range, include_origin)
+
+
+def create_radius_many(origins: np.ndarray, expand_range: int, include_origin=False):
+    """
+    create_radius for an (M, 2) array of origins at once, returns an (M, N, 2) int array
+    """
+    origins = np.asarray(origins, dtype=int).reshape(-1, 2)
+    return origins[:, None, :] + radius_offsets(expand_range, include_origin)[None, :, :]
@@ -0,0 +1,209 @@
+"""
+field of view on a 2D occupancy grid, built on the create_radius offset pattern
+
+every cell of a unit's radius pattern is visible unless a blocking cell lies on the line between the unit and it,
+the lines are precomputed once per radius, so recomputing a unit is one gather into the occupancy grid.
+only units that moved, or that have a changed tile in range, are recomputed by update()
+
+grids are indexed [x, y] so points from create_radius index them directly
+
+run headless from the repo root: python -m examples.misc.viewradius.visibility 300 512
+"""
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from examples.misc.viewradius.viewradius import radius_offsets
+
+
+def _round_half_away(values):
+    return np.sign(values) * np.floor(np.abs(values) + .5)
+
+
+@lru_cache(maxsize=32)
+def sight_lines(radius: int):
+    """
+    (offsets, lines, valid, lookup) for a radius, cached and read-only
+
+    offsets: (K, 2) unique cells of radius_offsets(radius) plus the origin
+    lines: (K, L, 2) cells strictly between the origin and each offset, padded with the origin
+    valid: (K, L) bool, False for padding
+    lookup: (2r + 1, 2r + 1) index into offsets for an offset + r, -1 outside the pattern
+    """
+    offsets = np.unique(radius_offsets(radius, include_origin=True), axis=0)
+    lengths = np.abs(offsets).max(axis=1)
+    steps = np.arange(1, max(int(lengths.max()), 1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fractions = steps[None, :] / lengths[:, None]
+    valid = steps[None, :] < lengths[:, None]
+    lines = _round_half_away(offsets[:, None, :] * np.where(valid, fractions, 0)[:, :, None]).astype(int)
+
+    lookup = np.full((2 * radius + 1, 2 * radius + 1), -1, dtype=np.intp)
+    lookup[offsets[:, 0] + radius, offsets[:, 1] + radius] = np.arange(len(offsets))
+
+    for array in (offsets, lines, valid, lookup):
+        array.flags.writeable = False
+    return offsets, lines, valid, lookup
+
+
+class VisibilityGrid:
+    def __init__(self, occupancy: np.ndarray, radius: int):
+        """
+        [occupancy] is a 2D bool array, True for tiles that block sight, [radius] is the default unit radius
+        """
+        self.occupancy = np.array(occupancy, dtype=bool)
+        if self.occupancy.ndim != 2:
+            raise ValueError(f'occupancy must be a 2D array, got shape {self.occupancy.shape}')
+        self.radius = radius
+        self._positions = {}
+        self._radii = {}
+        self._visible = {}
+        self._dirty = set()
+
+    @property
+    def shape(self):
+        return self.occupancy.shape
+
+    @property
+    def units(self):
+        return self._positions.keys()
+
+    @property
+    def dirty(self):
+        return frozenset(self._dirty)
+
+    def add_unit(self, unit_id, pos, radius=None):
+        self._positions[unit_id] = tuple(map(int, pos))
+        self._radii[unit_id] = self.radius if radius is None else radius
+        self._dirty.add(unit_id)
+
+    def remove_unit(self, unit_id):
+        """
+        returns True if the unit was removed, False if it was not present
+        """
+        if unit_id not in self._positions:
+            return False
+        del self._positions[unit_id], self._radii[unit_id]
+        self._visible.pop(unit_id, None)
+        self._dirty.discard(unit_id)
+        return True
+
+    def move_unit(self, unit_id, pos):
+        """
+        returns True if the unit changed tile and needs recomputing
+        """
+        pos = tuple(map(int, pos))
+        if self._positions[unit_id] == pos:
+            return False
+        self._positions[unit_id] = pos
+        self._dirty.add(unit_id)
+        return True
+
+    def set_blocking(self, points, blocking=True):
+        """
+        sets the given (x, y) point or (N, 2) points to [blocking], units that can have them in range are marked dirty
+        """
+        points = np.asarray(points, dtype=int).reshape(-1, 2)
+        changed = points[self.occupancy[points[:, 0], points[:, 1]] != blocking]
+        if not len(changed):
+            return
+        self.occupancy[changed[:, 0], changed[:, 1]] = blocking
+        if not self._positions:
+            return
+
+        ids = list(self._positions)
+        positions = np.array([self._positions[unit_id] for unit_id in ids])
+        radii = np.array([self._radii[unit_id] for unit_id in ids])
+        # chebyshev distance from every unit to every changed tile, the radius pattern never reaches past it
+        reach = np.abs(positions[:, None, :] - changed[None, :, :]).max(axis=2)
+        in_range = (reach <= radii[:, None]).any(axis=1)
+        self._dirty.update(unit_id for unit_id, hit in zip(ids, in_range.tolist()) if hit)
+
+    def update(self):
+        """
+        recomputes every dirty unit, grouped by radius so each group is one batched gather, returns the recomputed ids
+        """
+        dirty, self._dirty = self._dirty, set()
+        by_radius = {}
+        for unit_id in dirty:
+            by_radius.setdefault(self._radii[unit_id], []).append(unit_id)
+
+        width, height = self.occupancy.shape
+        for radius, ids in by_radius.items():
+            offsets, lines, valid, _ = sight_lines(radius)
+            origins = np.array([self._positions[unit_id] for unit_id in ids])
+            targets = origins[:, None, :] + offsets[None, :, :]
+            in_bounds = ((targets >= 0) & (targets < (width, height))).all(axis=2)
+            # a line never leaves the box spanned by its origin and target, so clipping only touches padding of
+            # out of bounds targets, which are discarded anyway
+            cells = origins[:, None, None, :] + lines[None, :, :, :]
+            xs = np.clip(cells[..., 0], 0, width - 1)
+            ys = np.clip(cells[..., 1], 0, height - 1)
+            blocked = (self.occupancy[xs, ys] & valid[None, :, :]).any(axis=2)
+            visible = in_bounds & ~blocked
+            for unit_id, row in zip(ids, visible):
+                self._visible[unit_id] = row
+
+        return dirty
+
+    def _visible_row(self, unit_id):
+        if unit_id in self._dirty or unit_id not in self._visible:
+            self.update()
+        return self._visible[unit_id]
+
+    def visible_cells(self, unit_id):
+        """
+        (N, 2) int array of the tiles [unit_id] can see
+        """
+        offsets = sight_lines(self._radii[unit_id])[0]
+        return np.asarray(self._positions[unit_id]) + offsets[self._visible_row(unit_id)]
+
+    def can_see(self, unit_id, pos):
+        radius = self._radii[unit_id]
+        dx, dy = (int(pos[0]) - self._positions[unit_id][0]) + radius, (int(pos[1]) - self._positions[unit_id][1]) + radius
+        if not (0 <= dx <= 2 * radius and 0 <= dy <= 2 * radius):
+            return False
+        index = sight_lines(radius)[3][dx, dy]
+        return index >= 0 and bool(self._visible_row(unit_id)[index])
+
+    def visible_mask(self, unit_id=None):
+        """
+        bool grid of the tiles [unit_id] can see, or that any unit can see if [unit_id] is None
+        """
+        if self._dirty:
+            self.update()
+        ids = self._positions if unit_id is None else (unit_id,)
+        mask = np.zeros(self.occupancy.shape, dtype=bool)
+        if ids:
+            cells = np.concatenate([self.visible_cells(i) for i in ids])
+            mask[cells[:, 0], cells[:, 1]] = True
+        return mask
+
+
+def main(count=300, size=512, radius=10, ticks=60):
+    rng = np.random.default_rng(0)
+    engine = VisibilityGrid(rng.random((size, size)) < .2, radius)
+    positions = rng.integers(0, size, (count, 2))
+    for unit_id, pos in enumerate(positions):
+        engine.add_unit(unit_id, pos)
+    start = time.perf_counter()
+    engine.update()
+    print(f'{count} units, {size}x{size}, radius {radius}: full compute {(time.perf_counter() - start) * 1000:.2f} ms')
+
+    start = time.perf_counter()
+    recomputed = 0
+    for _ in range(ticks):
+        # a quarter of the units step to a neighbouring tile each tick
+        movers = rng.choice(count, count // 4, replace=False)
+        positions[movers] = np.clip(positions[movers] + rng.integers(-1, 2, (len(movers), 2)), 0, size - 1)
+        for unit_id in movers.tolist():
+            engine.move_unit(unit_id, positions[unit_id])
+        recomputed += len(engine.update())
+    elapsed = time.perf_counter() - start
+    print(f'{ticks} ticks: {elapsed / ticks * 1000:.2f} ms/tick, {recomputed / ticks:.1f} units recomputed per tick')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -1,15 +1,19 @@
-from functools import lru_cache
-
 import numpy as np
 
+from misc.vector import VectorCache
+
+vector2_cache = VectorCache(capacity=100)
+
+
+def _new_vector2(cls, x, y):
+    arr: Vector2 = np.asarray([x, y], dtype=np.float64).view(cls)
+    arr.setflags(write=False)
+    return arr
+
 
 class Vector2(np.ndarray):
-    @staticmethod
-    @lru_cache(maxsize=100)
     def __new__(cls, x: float, y: float) -> 'Vector2':
-        arr: Vector2 = np.asarray([x, y], dtype=np.float64).view(cls)
-        arr.setflags(write=False)
-        return arr
+        return vector2_cache.intern(cls, x, y, _new_vector2)
 
     def tuplef(self):
         return tuple(self)
@@ -0,0 +1,148 @@
+import numpy as np
+
+from misc.vector import Vector
+
+
+class AABB:
+    """
+    axis aligned box with pure arithmetic contains / intersects / union,
+    the shapely geometry is only created when it is first needed for a non rectangular test
+    """
+    __slots__ = ('min_x', 'min_y', 'max_x', 'max_y', '_geometry')
+
+    def __init__(self, min_x, min_y, max_x, max_y):
+        self.min_x = min_x
+        self.min_y = min_y
+        self.max_x = max_x
+        self.max_y = max_y
+        self._geometry = None
+
+    @classmethod
+    def from_points(cls, v1, v2):
+        return cls(min(v1[0], v2[0]), min(v1[1], v2[1]), max(v1[0], v2[0]), max(v1[1], v2[1]))
+
+    @classmethod
+    def from_coords(cls, x1, y1, x2, y2):
+        return cls(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+    @property
+    def bottom_left(self):
+        return Vector(self.min_x, self.min_y)
+
+    @property
+    def top_left(self):
+        return Vector(self.min_x, self.max_y)
+
+    @property
+    def bottom_right(self):
+        return Vector(self.max_x, self.min_y)
+
+    @property
+    def top_right(self):
+        return Vector(self.max_x, self.max_y)
+
+    @property
+    def center(self):
+        return Vector((self.min_x + self.max_x) / 2, (self.min_y + self.max_y) / 2)
+
+    @property
+    def size(self):
+        return Vector(self.max_x - self.min_x, self.max_y - self.min_y)
+
+    @property
+    def bounds_tuple(self):
+        return (self.min_x, self.min_y), (self.max_x, self.max_y)
+
+    @property
+    def geometry(self):
+        if self._geometry is None:
+            from shapely import geometry as geo
+            self._geometry = geo.box(self.min_x, self.min_y, self.max_x, self.max_y)
+        return self._geometry
+
+    def contains_point(self, x, y):
+        return self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y
+
+    def intersects(self, other: 'AABB'):
+        return (self.min_x <= other.max_x and other.min_x <= self.max_x
+                and self.min_y <= other.max_y and other.min_y <= self.max_y)
+
+    def union(self, other: 'AABB'):
+        return AABB(
+            min(self.min_x, other.min_x),
+            min(self.min_y, other.min_y),
+            max(self.max_x, other.max_x),
+            max(self.max_y, other.max_y),
+        )
+
+    def __contains__(self, item):
+        match item:
+            case AABB():
+                return self.intersects(item)
+            case Vector():
+                return self.contains_point(item.xf, item.yf)
+            case (x, y):
+                return self.contains_point(x, y)
+            case _ if hasattr(item, 'geom_type'):
+                return self.geometry.intersects(item)
+            case _:
+                raise ValueError(f'invalid type for __contains__ in {self.__class__.__name__}: {type(item)}')
+
+    def __repr__(self):
+        return f'<{type(self).__name__} ({self.min_x}, {self.min_y}) ({self.max_x}, {self.max_y})>'
+
+
+class AABBArray:
+    """
+    N boxes stored as (N, 2) min and max arrays, the batch counterpart of AABB
+    """
+    __slots__ = ('mins', 'maxs')
+
+    def __init__(self, mins, maxs):
+        mins, maxs = np.asarray(mins, dtype=np.float64), np.asarray(maxs, dtype=np.float64)
+        self.mins = np.minimum(mins, maxs)
+        self.maxs = np.maximum(mins, maxs)
+
+    @classmethod
+    def from_centers(cls, centers, sizes):
+        half = np.asarray(sizes, dtype=np.float64) / 2
+        if half.ndim == 1:
+            half = half[:, None]
+        return cls(centers - half, centers + half)
+
+    def __len__(self):
+        return len(self.mins)
+
+    def __getitem__(self, index):
+        return AABB(*self.mins[index].tolist(), *self.maxs[index].tolist())
+
+    @property
+    def centers(self):
+        return (self.mins + self.maxs) / 2
+
+    @property
+    def sizes(self):
+        return self.maxs - self.mins
+
+    def contains_points(self, points):
+        """
+        [points] is a single point, tested against every box, or an (N, 2) array tested pairwise
+        """
+        points = np.asarray(points, dtype=np.float64)
+        return np.all((self.mins <= points) & (points <= self.maxs), axis=-1)
+
+    def intersects(self, other):
+        """
+        [other] is an AABB, tested against every box, or an AABBArray of the same length tested pairwise
+        """
+        if isinstance(other, AABB):
+            other_mins, other_maxs = (other.min_x, other.min_y), (other.max_x, other.max_y)
+        else:
+            other_mins, other_maxs = other.mins, other.maxs
+        return np.all((self.mins <= other_maxs) & (other_mins <= self.maxs), axis=-1)
+
+    def union(self):
+        """
+        returns the AABB enclosing every box
+        """
+        return AABB(*self.mins.min(axis=0).tolist(), *self.maxs.max(axis=0).tolist())
@@ -1,11 +1,38 @@
 from math import radians, sin, cos
 
+import numpy as np
+
+# one entry per whole angle from 0 to 361, so every angle in the [0, 361) range Angle wraps to rounds into it,
+# same values apply_angle produces for that angle
+TRIG_TABLE = np.array([(radians(cos(angle)), radians(sin(angle))) for angle in range(362)])
+
 
 def apply_angle(angle, dist, *args):
     x, y = args[0] if len(args) == 1 else args
     return x + dist * radians(cos(angle)), y + dist * radians(sin(angle))
 
 
+def apply_angles(positions, angles, dists, use_table=False, out=None):
+    """
+    apply_angle for a whole (N, 2) array of positions at once, [angles] and [dists] are scalars or length N arrays
+
+    use_table looks cos / sin up in TRIG_TABLE instead of computing them, angles are rounded to the nearest whole angle
+    and must round into 0 - 361, which covers the [0, 361) range Angle.rotate keeps angles in,
+    angles outside it raise ValueError instead of being wrapped, whole angles give the exact apply_angle result
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    dists = np.asarray(dists, dtype=np.float64)
+    if use_table:
+        index = np.rint(angles).astype(np.intp)
+        if np.any((index < 0) | (index >= len(TRIG_TABLE))):
+            raise ValueError('use_table only supports angles that round to 0 - 361')
+        offsets = TRIG_TABLE[index]
+    else:
+        angles = np.asarray(angles, dtype=np.float64)
+        offsets = np.radians(np.stack((np.cos(angles), np.sin(angles)), axis=-1))
+    return np.add(positions, offsets * dists[..., None], out=out)
+
+
 class Angle:
     __slots__ = 'angle', 'initial_angle', 'last'
 
@@ -0,0 +1,90 @@
+import arcade as arc
+import numpy as np
+
+
+def current_viewport():
+    """
+    (left, right, bottom, top) world area currently on screen,
+    arcade 2.x reports it with get_viewport, on 3.x the window corners are unprojected through the active camera
+    """
+    if hasattr(arc, 'get_viewport'):
+        return tuple(arc.get_viewport())
+    window = arc.get_window()
+    camera = window.current_camera
+    (x1, y1, *_), (x2, y2, *_) = camera.unproject((0, 0)), camera.unproject((window.width, window.height))
+    return min(x1, x2), max(x1, x2), min(y1, y2), max(y1, y2)
+
+
+def viewport_bounds(viewport=None, margin=0):
+    """
+    converts an arcade (left, right, bottom, top) viewport into grid bounds, defaults to current_viewport()
+    """
+    left, right, bottom, top = current_viewport() if viewport is None else viewport
+    return (left - margin, bottom - margin), (right + margin, top + margin)
+
+
+def cull_to_viewport(grid, viewport=None, margin=0):
+    """
+    returns the sorted grid ids of the objects in [grid] whose buckets touch the viewport,
+    fetched with a single query_many call so they stay in one numpy array
+    """
+    ids, _ = grid.query_many(np.array([viewport_bounds(viewport, margin)], dtype=np.float64))
+    return np.sort(ids)
+
+
+class CircleSprites:
+    """
+    persistent SpriteList with one tinted circle sprite per object, created once,
+    each frame update() only moves the sprites for the given ids and flips visibility where it changed,
+    so no geometry is rebuilt and the whole set is still drawn with a single draw call
+    """
+
+    def __init__(self, radii, colors, alpha=255, ids=None):
+        """
+        [radii] is (N,) or a scalar and [colors] is (N, 3) or (N, 4), the alpha channel of [colors] is ignored,
+        [ids] are the (N,) ids the objects have in the grid, row i of every array belongs to ids[i],
+        they default to the row numbers
+        """
+        colors = np.asarray(colors)
+        if ids is None:
+            self._sorted_ids = self._rows = None
+        else:
+            ids = np.asarray(ids)
+            self._rows = np.argsort(ids, kind='stable')
+            self._sorted_ids = ids[self._rows]
+        radii = np.broadcast_to(np.asarray(radii), (len(colors),))
+        self.sprites = arc.SpriteList()
+        for radius, color in zip(radii.tolist(), colors[:, :3].tolist()):
+            # white circles share one texture per radius and are tinted per sprite
+            sprite = arc.SpriteCircle(max(int(radius), 1), arc.color.WHITE)
+            sprite.color = (*color, alpha)
+            sprite.alpha = alpha
+            sprite.visible = False
+            self.sprites.append(sprite)
+        self._shown = np.zeros(len(colors), dtype=bool)
+
+    def rows_for(self, ids):
+        """
+        maps grid ids, for example from cull_to_viewport, to row numbers
+        """
+        ids = np.asarray(ids)
+        if self._sorted_ids is None:
+            return ids.astype(np.intp)
+        return self._rows[np.searchsorted(self._sorted_ids, ids)]
+
+    def update(self, ids, positions):
+        """
+        shows only the sprites of [ids] and moves them to their rows of the (N, 2) [positions]
+        """
+        indices = self.rows_for(ids)
+        shown = np.zeros_like(self._shown)
+        shown[indices] = True
+        sprites = self.sprites
+        for i in np.flatnonzero(shown != self._shown).tolist():
+            sprites[i].visible = not self._shown[i]
+        self._shown = shown
+        for i, position in zip(indices.tolist(), positions[indices].tolist()):
+            sprites[i].position = position
+
+    def draw(self):
+        self.sprites.draw()
@@ -0,0 +1,69 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class FixedTimestep:
+    """
+    accumulates frame time and calls [step] with a fixed [dt], at most [max_substeps] times per frame,
+    so the simulation advances the same way no matter the frame rate
+
+    time that does not fit in [max_substeps] steps is dropped instead of carried over, which keeps a slow frame
+    from causing even slower ones, the leftover fraction of a step is exposed as [alpha] for interpolation
+    """
+
+    def __init__(self, step, dt=1 / 60, max_substeps=5):
+        self.step = step
+        self.dt = dt
+        self.max_substeps = max_substeps
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.steps = 0
+        self.dropped_time = 0.0
+
+    def advance(self, frame_time):
+        """
+        returns the number of steps that were run for this frame
+        """
+        self.accumulator += frame_time
+        substeps = 0
+        while self.accumulator >= self.dt and substeps < self.max_substeps:
+            self.step(self.dt)
+            self.accumulator -= self.dt
+            substeps += 1
+        if self.accumulator >= self.dt:
+            leftover = self.accumulator % self.dt
+            self.dropped_time += self.accumulator - leftover
+            self.accumulator = leftover
+        self.steps += substeps
+        self.alpha = self.accumulator / self.dt
+        return substeps
+
+
+class PhaseTimer:
+    """
+    sums wall clock time per named phase over a frame, use as `with timer('draw'): ...` and call end_frame() once
+    per frame to fold the sums into exponentially smoothed averages
+    """
+
+    def __init__(self, smoothing=0.9):
+        self.smoothing = smoothing
+        self.current = defaultdict(float)
+        self.averages = {}
+
+    @contextmanager
+    def __call__(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[phase] += time.perf_counter() - start
+
+    def end_frame(self):
+        for phase, elapsed in self.current.items():
+            average = self.averages.get(phase)
+            self.averages[phase] = elapsed if average is None else average * self.smoothing + elapsed * (1 - self.smoothing)
+        self.current.clear()
+
+    def summary(self):
+        return ' '.join(f'{phase}={average * 1000:.2f}ms' for phase, average in self.averages.items())
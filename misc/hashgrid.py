@@ -1,6 +1,14 @@
-from collections import defaultdict
+import dataclasses
+import heapq
+import struct
+import threading
+from collections import Counter, defaultdict
+from math import hypot, inf, isfinite, sqrt
+from operator import itemgetter
 from typing import Hashable
 
+import numpy as np
+
 
 def _iter_2d_coords(topleft, bottomright, bucket_size):
     for x in range(min(int(topleft[0]), int(bottomright[0])) // bucket_size, (max(int(topleft[0]), int(bottomright[0])) // bucket_size) + 1):
@@ -8,104 +16,1271 @@ def _iter_2d_coords(topleft, bottomright, bucket_size):
             yield x, y
 
 
+def _iter_ring(cx, cy, ring):
+    if not ring:
+        yield cx, cy
+        return
+    for x in range(cx - ring, cx + ring + 1):
+        yield x, cy - ring
+        yield x, cy + ring
+    for y in range(cy - ring + 1, cy + ring):
+        yield cx - ring, y
+        yield cx + ring, y
+
+
+def _normalize_bounds(bounds):
+    (x1, y1), (x2, y2) = bounds[0], bounds[1]
+    return float(min(x1, x2)), float(min(y1, y2)), float(max(x1, x2)), float(max(y1, y2))
+
+
+def _ray_box_entry(box, ox, oy, dx, dy):
+    """
+    slab test, returns the distance along the ray at which it enters [box] or None if it misses
+    """
+    t_min, t_max = 0.0, inf
+    for origin, direction, low, high in ((ox, dx, box[0], box[2]), (oy, dy, box[1], box[3])):
+        if direction == 0:
+            if origin < low or origin > high:
+                return None
+            continue
+        near, far = (low - origin) / direction, (high - origin) / direction
+        if near > far:
+            near, far = far, near
+        t_min, t_max = max(t_min, near), min(t_max, far)
+        if t_min > t_max:
+            return None
+    return t_min
+
+
+def _normalize_ray(origin, direction, max_dist):
+    if not isfinite(max_dist):
+        raise ValueError(f'max_dist must be finite, got {max_dist}')
+    length = hypot(direction[0], direction[1])
+    if not length:
+        raise ValueError('direction must not be a zero vector')
+    return float(origin[0]), float(origin[1]), direction[0] / length, direction[1] / length
+
+
+def _cell_edge(cell, bucket_size):
+    """
+    lower edge of [cell] along one axis as inserts assign it, int() truncates towards zero so every cell below 0
+    is shifted down by one unit and cell 0 is one unit wider
+    """
+    return cell * bucket_size if cell > 0 else cell * bucket_size - 1
+
+
+def _iter_ray_cells(ox, oy, dx, dy, max_dist, bucket_size):
+    """
+    DDA traversal, yields every cell the ray passes through in order with the distance at which the ray leaves it,
+    cells are assigned with int() truncation to match inserts
+    """
+    cx, cy = int(ox) // bucket_size, int(oy) // bucket_size
+    step_x, step_y = (1 if dx > 0 else -1), (1 if dy > 0 else -1)
+    next_x = (_cell_edge(cx + (dx > 0), bucket_size) - ox) / dx if dx else inf
+    next_y = (_cell_edge(cy + (dy > 0), bucket_size) - oy) / dy if dy else inf
+    while True:
+        exit_dist = min(next_x, next_y, max_dist)
+        yield (cx, cy), exit_dist
+        if exit_dist >= max_dist:
+            return
+        if next_x < next_y:
+            cx += step_x
+            next_x = (_cell_edge(cx + (dx > 0), bucket_size) - ox) / dx
+        else:
+            cy += step_y
+            next_y = (_cell_edge(cy + (dy > 0), bucket_size) - oy) / dy
+
+
+def _box_distance(box, x, y):
+    min_x, min_y, max_x, max_y = box
+    return hypot(max(min_x - x, 0, x - max_x), max(min_y - y, 0, y - max_y))
+
+
+def _explored_distance(x, y, cx, cy, ring, bucket_size):
+    """
+    lower bound for the distance from (x, y) to anything outside the square of cells [ring] cells around (cx, cy),
+    one unit is taken off because cells are assigned with int() truncation rather than floor
+    """
+    return min(
+        x - (cx - ring) * bucket_size, (cx + ring + 1) * bucket_size - x,
+        y - (cy - ring) * bucket_size, (cy + ring + 1) * bucket_size - y,
+    ) - 1
+
+
+def _boxes_overlap(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def suggest_bucket_size(mins, maxs, target_per_cell=4):
+    """
+    picks a bucket size from the object size distribution: twice the median object extent,
+    raised if needed so that on average about [target_per_cell] objects share a cell
+    """
+    mins, maxs = np.asarray(mins, dtype=np.float64).reshape(-1, 2), np.asarray(maxs, dtype=np.float64).reshape(-1, 2)
+    if not len(mins):
+        return 1
+    lo, hi = np.minimum(mins, maxs), np.maximum(mins, maxs)
+    by_size = 2 * float(np.median((hi - lo).max(axis=1)))
+    world = hi.max(axis=0) - lo.min(axis=0)
+    by_density = sqrt(float(world[0] * world[1]) * target_per_cell / len(mins))
+    return max(1, int(round(max(by_size, by_density))))
+
+
+@dataclasses.dataclass
+class HashGridStats:
+    bucket_size: int
+    objects: int
+    occupied_cells: int
+    objects_per_cell: Counter
+    cells_per_object: Counter
+    queries: int
+    query_candidates: int
+    query_unique: int
+
+    @property
+    def mean_objects_per_cell(self):
+        return sum(k * v for k, v in self.objects_per_cell.items()) / max(self.occupied_cells, 1)
+
+    @property
+    def mean_cells_per_object(self):
+        return sum(k * v for k, v in self.cells_per_object.items()) / max(self.objects, 1)
+
+    @property
+    def candidates_per_unique(self):
+        """
+        bucket entries scanned per distinct object the bucket scans produced, the results before any exact test
+        """
+        return self.query_candidates / max(self.query_unique, 1)
+
+
+def _fill_out(out, objects):
+    """
+    writes query results into [out] and returns it:
+    a list is cleared and refilled, a numpy array is filled from the start and the used view is returned
+    """
+    if not isinstance(out, np.ndarray):
+        out.clear()
+        out.extend(objects.tolist() if isinstance(objects, np.ndarray) else objects)
+        return out
+    if isinstance(objects, np.ndarray):
+        if len(objects) > len(out):
+            raise ValueError(f'output buffer of size {len(out)} is too small for {len(objects)} results')
+        out[:len(objects)] = objects
+        return out[:len(objects)]
+    n = 0
+    for obj in objects:
+        if n == len(out):
+            raise ValueError(f'output buffer of size {len(out)} is too small for the results')
+        out[n] = obj
+        n += 1
+    return out[:n]
+
+
+def _as_id_array(ids):
+    arr = np.asarray(ids)
+    if arr.ndim != 1:
+        arr = np.fromiter(ids, dtype=object, count=len(ids))
+    return arr
+
+
 class HashGrid:
+    """
+    buckets are insertion ordered dicts used as ordered sets, and every object keeps a {cell: bucket} map,
+    so removing or moving an object costs O(cells touched) instead of O(objects in those cells)
+
+    each bucket maps an object to a one item list shared by all of its buckets holding the generation of the last
+    query that returned it, area queries use it to drop duplicates without hashing objects into a set
+    """
+
     def __init__(self, bucket_size=200):
         self.bucket_size = bucket_size
-        self._contents: defaultdict[Hashable, list] = defaultdict(list)
-        self._buckets_for_object: defaultdict[Hashable, list] = defaultdict(list)
+        self._contents: defaultdict[Hashable, dict] = defaultdict(dict)
+        self._buckets_for_object: defaultdict[Hashable, dict] = defaultdict(dict)
+        self._bounds_for_object: dict[Hashable, tuple] = {}
+        self._stamps: dict[Hashable, list] = {}
+        self._generation = 0
+        self.reset_query_stats()
 
     def add(self, obj, bounds):
-        for x, y in _iter_2d_coords(bounds[0], bounds[1], self.bucket_size):
-            bucket = self._contents[x, y]
-            bucket.append(obj)
-            self._buckets_for_object[obj].append(bucket)
+        self._bounds_for_object[obj] = _normalize_bounds(bounds)
+        stamp = self._stamps.setdefault(obj, [0])
+        buckets = self._buckets_for_object[obj]
+        for coords in _iter_2d_coords(bounds[0], bounds[1], self.bucket_size):
+            bucket = self._contents[coords]
+            bucket[obj] = stamp
+            buckets[coords] = bucket
 
     def add_all(self, *obj_bound_pairs):
         for obj, bound in obj_bound_pairs:
             self.add(obj, bound)
 
+    def rebuild(self, ids, mins, maxs):
+        """
+        replaces the contents of the grid with [ids] and their bounds in one pass,
+        existing buckets are cleared and refilled instead of being reallocated
+        """
+        mins, maxs = np.asarray(mins), np.asarray(maxs)
+        lo = np.minimum(mins, maxs).astype(np.int64) // self.bucket_size
+        hi = np.maximum(mins, maxs).astype(np.int64) // self.bucket_size
+        if isinstance(ids, np.ndarray):
+            ids = ids.tolist()
+
+        for bucket in self._contents.values():
+            bucket.clear()
+        self._buckets_for_object.clear()
+        self._bounds_for_object = dict(zip(ids, zip(
+            *np.minimum(mins, maxs).astype(np.float64).T.tolist(),
+            *np.maximum(mins, maxs).astype(np.float64).T.tolist(),
+        )))
+        self._stamps = stamps = {obj: [0] for obj in ids}
+
+        contents, buckets_for_object = self._contents, self._buckets_for_object
+        for obj, x0, y0, x1, y1 in zip(ids, *lo.T.tolist(), *hi.T.tolist()):
+            buckets, stamp = buckets_for_object[obj], stamps[obj]
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    bucket = contents[x, y]
+                    bucket[obj] = stamp
+                    buckets[x, y] = bucket
+
     def remove(self, obj):
-        if obj not in self._buckets_for_object:
+        buckets = self._buckets_for_object.pop(obj, None)
+        if buckets is None:
             return False
-        for bucket in self._buckets_for_object[obj]:
-            bucket.remove(obj)
-        del self._buckets_for_object[obj]
+        for bucket in buckets.values():
+            del bucket[obj]
+        del self._bounds_for_object[obj]
+        del self._stamps[obj]
+        return True
 
     def update(self, obj, bounds):
-        if obj not in self._buckets_for_object:
+        """
+        moves [obj] to [bounds], returns True if it was moved and False if it is not in the grid,
+        use update_cells to also find out whether the cells it covers changed
+        """
+        return self.update_cells(obj, bounds) is not None
+
+    def update_cells(self, obj, bounds):
+        """
+        moves [obj] to [bounds], only the buckets it left or entered are modified
+
+        returns True if the cells covered by [obj] changed, False if they did not, and None if [obj] is not in the grid
+        """
+        buckets = self._buckets_for_object.get(obj)
+        if buckets is None:
+            return None
+        self._bounds_for_object[obj] = _normalize_bounds(bounds)
+        cells = set(_iter_2d_coords(bounds[0], bounds[1], self.bucket_size))
+        if buckets.keys() == cells:
             return False
-        for bucket in self._buckets_for_object[obj]:
-            bucket.remove(obj)
-        self._buckets_for_object[obj].clear()
-
-        for x, y in _iter_2d_coords(bounds[0], bounds[1], self.bucket_size):
-            bucket = self._contents[x, y]
-            bucket.append(obj)
-            self._buckets_for_object[obj].append(bucket)
+
+        for coords in buckets.keys() - cells:
+            del buckets.pop(coords)[obj]
+        stamp = self._stamps[obj]
+        for coords in cells - buckets.keys():
+            bucket = self._contents[coords]
+            bucket[obj] = stamp
+            buckets[coords] = bucket
         return True
 
     def to_bucket_coord(self, point):
         return int(point[0] // self.bucket_size), int(point[1] // self.bucket_size)
 
+    def _clear_bucket(self, coords, filter_func):
+        bucket = self._contents[coords]
+        for obj in tuple(bucket if filter_func is None else filter(filter_func, bucket)):
+            del bucket[obj]
+            buckets = self._buckets_for_object[obj]
+            del buckets[coords]
+            # an object cleared from its last bucket is gone from the grid, the same as remove()
+            if not buckets:
+                del self._buckets_for_object[obj], self._bounds_for_object[obj], self._stamps[obj]
+        if not bucket:
+            del self._contents[coords]
+
     def clear_bounds(self, bounds, filter_func=None):
-        for x, y in _iter_2d_coords(bounds[0], bounds[1], self.bucket_size):
-            if (coords := (x, y)) in self._contents:
-                bucket = self._contents[coords]
-                if filter_func is None:
-                    bucket.clear()
-                    del self._contents[coords]
-                else:
-                    container = bucket
-                    for obj in tuple(filter(filter_func, container)):
-                        container.remove(obj)
-                        self._buckets_for_object[obj].remove(container)
-                    if not container:
-                        del self._contents[coords]
+        for coords in _iter_2d_coords(bounds[0], bounds[1], self.bucket_size):
+            if coords in self._contents:
+                self._clear_bucket(coords, filter_func)
 
     def clear_point(self, point, filter_func=None):
         point = self.to_bucket_coord(point)
-        if point not in self._contents:
-            return
-
-        bucket = self._contents[point]
-        if filter_func is None:
-            bucket.clear()
-            del self._contents[point]
-        else:
-            container = bucket
-            for obj in tuple(filter(filter_func, container)):
-                container.remove(obj)
-                self._buckets_for_object[obj].remove(container)
-            if not container:
-                del self._contents[point]
+        if point in self._contents:
+            self._clear_bucket(point, filter_func)
 
     def clear(self):
         self._contents.clear()
         self._buckets_for_object.clear()
+        self._bounds_for_object.clear()
+        self._stamps.clear()
 
-    def get_objects_for_point(self, point):
-        point = self.to_bucket_coord(point)
-        if point in self._contents:
-            return set(self._contents[point])
-        return set()
+    def iter_objects_for_point(self, point):
+        """
+        lazy variant of get_objects_for_point, the grid must not be modified while iterating
+        """
+        bucket = self._contents.get(self.to_bucket_coord(point))
+        if bucket:
+            yield from bucket
+
+    def iter_objects_for_area(self, bounds):
+        """
+        lazy variant of get_objects_for_area, the grid must not be modified while iterating
+
+        duplicates are dropped with generation stamps, so interleaving two of these iterators
+        over the same grid can yield an object more than once
+        """
+        return self._iter_unique(_iter_2d_coords(bounds[0], bounds[1], self.bucket_size), self._new_query())
+
+    def _new_query(self):
+        self._generation += 1
+        self._queries += 1
+        return self._generation
+
+    def _iter_unique(self, cells, generation):
+        # stats are counted in locals and added once, also when the caller stops iterating early
+        contents, candidates, unique = self._contents, 0, 0
+        try:
+            for coords in cells:
+                bucket = contents.get(coords)
+                if not bucket:
+                    continue
+                candidates += len(bucket)
+                for obj, stamp in bucket.items():
+                    if stamp[0] != generation:
+                        stamp[0] = generation
+                        unique += 1
+                        yield obj
+        finally:
+            self._query_candidates += candidates
+            self._query_unique += unique
+
+    def get_objects_for_point(self, point, out=None):
+        """
+        returns a new set, or writes the objects into [out] and returns it:
+        a list is cleared and refilled, a numpy array is filled from the start and the used view is returned
+        """
+        if out is None:
+            return set(self.iter_objects_for_point(point))
+        return _fill_out(out, self.iter_objects_for_point(point))
+
+    def get_objects_for_area(self, bounds, out=None):
+        """
+        returns a new set, or writes the objects into [out] and returns it:
+        a list is cleared and refilled, a numpy array is filled from the start and the used view is returned
+        """
+        if out is None:
+            return set(self.iter_objects_for_area(bounds))
+        return _fill_out(out, self.iter_objects_for_area(bounds))
+
+    def query_radius(self, center, r):
+        """
+        returns the objects whose bounds are within [r] of [center]
+        """
+        x, y = float(center[0]), float(center[1])
+        bounds = self._bounds_for_object
+        return {obj for obj in self.iter_objects_for_area(((x - r, y - r), (x + r, y + r)))
+                if _box_distance(bounds[obj], x, y) <= r}
 
-    def get_objects_for_area(self, bounds):
-        objects = []
-        for point in _iter_2d_coords(bounds[0], bounds[1], self.bucket_size):
-            if point in self._contents:
-                objects.extend(self._contents[point])
-        return set(objects)
+    def nearest(self, point, k=1, max_dist=inf):
+        """
+        returns up to [k] objects ordered by the distance from [point] to their bounds,
+        buckets are searched ring by ring and the search stops once no unexplored cell can beat the k-th best distance
+        """
+        if k < 1:
+            return []
+        x, y = float(point[0]), float(point[1])
+        cx, cy = int(x) // self.bucket_size, int(y) // self.bucket_size
+        contents, bounds = self._contents, self._bounds_for_object
+        query, seen, candidates = self._new_query(), 0, []
+        ring, ring_limit = 0, None
+        while True:
+            for obj in self._iter_unique(_iter_ring(cx, cy, ring), query):
+                seen += 1
+                if (dist := _box_distance(bounds[obj], x, y)) <= max_dist:
+                    candidates.append((dist, obj))
+
+            explored = _explored_distance(x, y, cx, cy, ring, self.bucket_size)
+            if explored >= max_dist or seen == len(bounds):
+                break
+            if len(candidates) >= k and heapq.nsmallest(k, candidates, key=itemgetter(0))[-1][0] <= explored:
+                break
+            if ring_limit is None and ring >= 8:
+                ring_limit = max((max(abs(bx - cx), abs(by - cy)) for (bx, by), bucket in contents.items() if bucket), default=0)
+                # ring i has 8 * i cells, on a sparse grid scanning every object is cheaper than the remaining rings
+                if 4 * (ring_limit * (ring_limit + 1) - ring * (ring + 1)) > len(bounds):
+                    candidates = [(dist, obj) for obj, box in bounds.items() if (dist := _box_distance(box, x, y)) <= max_dist]
+                    break
+            if ring_limit is not None and ring >= ring_limit:
+                break
+            ring += 1
+
+        return [obj for _, obj in heapq.nsmallest(k, candidates, key=itemgetter(0))]
+
+    def query_many(self, bounds):
+        """
+        answers an (N, 2, 2) array of query boxes in one call,
+        returns (ids, offsets) where the objects found for query i are ids[offsets[i]:offsets[i + 1]]
+
+        duplicates are dropped with generation stamps instead of a set per query
+        """
+        ids, offsets = [], [0]
+        for topleft, bottomright in np.asarray(bounds).tolist():
+            ids.extend(self.iter_objects_for_area((topleft, bottomright)))
+            offsets.append(len(ids))
+        return _as_id_array(ids), np.array(offsets, dtype=np.intp)
+
+    def iter_candidate_pairs(self, exact=False):
+        """
+        yields every unordered pair of objects that share at least one bucket, exactly once,
+        a pair is only emitted from the first cell both objects cover so multi cell objects are not repeated
+
+        if [exact] is True pairs whose bounds do not overlap are dropped
+        """
+        bounds, bucket_size = self._bounds_for_object, self.bucket_size
+        first_cell = {obj: (int(box[0]) // bucket_size, int(box[1]) // bucket_size) for obj, box in bounds.items()}
+        for (x, y), bucket in self._contents.items():
+            if len(bucket) < 2:
+                continue
+            objects = list(bucket)
+            for i, a in enumerate(objects):
+                ax, ay = first_cell[a]
+                for b in objects[i + 1:]:
+                    bx, by = first_cell[b]
+                    if (ax if ax > bx else bx) != x or (ay if ay > by else by) != y:
+                        continue
+                    if not exact or _boxes_overlap(bounds[a], bounds[b]):
+                        yield a, b
+
+    def candidate_pairs_array(self, exact=False):
+        """
+        same pairs as iter_candidate_pairs as an (M, 2) array
+        """
+        return _as_id_array([obj for pair in self.iter_candidate_pairs(exact) for obj in pair]).reshape(-1, 2)
+
+    def raycast(self, origin, direction, max_dist):
+        """
+        yields (obj, distance) for every object whose bounds the ray hits within [max_dist], nearest hit first,
+        cells are walked along the ray with a DDA traversal so only buckets on the ray are visited
+
+        the generator is lazy, next(grid.raycast(...), None) stops at the first hit,
+        duplicates are dropped with a set owned by the ray rather than the shared generation stamps,
+        so other queries can run on the grid between yields
+        """
+        ox, oy, dx, dy = _normalize_ray(origin, direction, max_dist)
+        contents, bounds, seen, hits, candidates = self._contents, self._bounds_for_object, set(), [], 0
+        self._queries += 1
+        try:
+            for coords, exit_dist in _iter_ray_cells(ox, oy, dx, dy, max_dist, self.bucket_size):
+                bucket = contents.get(coords)
+                if bucket:
+                    candidates += len(bucket)
+                    for obj in bucket:
+                        if obj in seen:
+                            continue
+                        seen.add(obj)
+                        dist = _ray_box_entry(bounds[obj], ox, oy, dx, dy)
+                        if dist is not None and dist <= max_dist:
+                            heapq.heappush(hits, (dist, id(obj), obj))
+                while hits and hits[0][0] <= exit_dist:
+                    dist, _, obj = heapq.heappop(hits)
+                    yield obj, dist
+        finally:
+            self._query_candidates += candidates
+            self._query_unique += len(seen)
 
     def get_all_objects(self):
-        seen = set()
-        for bucket in self._contents.values():
+        for obj, buckets in self._buckets_for_object.items():
+            if buckets:
+                yield obj
+
+    def copy(self):
+        return self._copy_as(HashGrid)
+
+    def snapshot(self, copy=True):
+        """
+        returns a read only HashGridSnapshot of the current contents,
+        with [copy] False the contents are moved into the snapshot and this grid is left empty
+        """
+        if copy:
+            return self._copy_as(HashGridSnapshot)
+        snapshot = HashGridSnapshot(self.bucket_size)
+        snapshot._contents, snapshot._buckets_for_object = self._contents, self._buckets_for_object
+        snapshot._bounds_for_object, snapshot._stamps = self._bounds_for_object, self._stamps
+        self._contents, self._buckets_for_object = defaultdict(dict), defaultdict(dict)
+        self._bounds_for_object, self._stamps = {}, {}
+        return snapshot
+
+    def _copy_as(self, cls):
+        grid = cls(self.bucket_size)
+        grid._bounds_for_object = self._bounds_for_object.copy()
+        grid._stamps = stamps = {obj: [0] for obj in self._bounds_for_object}
+        for coords, bucket in self._contents.items():
+            if bucket:
+                grid._contents[coords] = {obj: stamps[obj] for obj in bucket}
+        for obj, buckets in self._buckets_for_object.items():
+            grid._buckets_for_object[obj] = {coords: grid._contents[coords] for coords in buckets}
+        return grid
+
+    def reset_query_stats(self):
+        self._queries = self._query_candidates = self._query_unique = 0
+
+    def stats(self):
+        """
+        occupancy histograms plus the bucket entries scanned and distinct objects found by queries since the last
+        reset_query_stats, a candidates_per_unique well above 1 means objects span many buckets and the bucket size
+        is too small
+        """
+        return HashGridStats(
+            bucket_size=self.bucket_size,
+            objects=sum(1 for buckets in self._buckets_for_object.values() if buckets),
+            occupied_cells=sum(1 for bucket in self._contents.values() if bucket),
+            objects_per_cell=Counter(len(bucket) for bucket in self._contents.values() if bucket),
+            cells_per_object=Counter(len(buckets) for buckets in self._buckets_for_object.values() if buckets),
+            queries=self._queries,
+            query_candidates=self._query_candidates,
+            query_unique=self._query_unique,
+        )
+
+    def rebucket(self, bucket_size):
+        """
+        re-inserts every object from its stored bounds using the new [bucket_size]
+        """
+        ids = list(self._bounds_for_object)
+        boxes = np.array(list(self._bounds_for_object.values()), dtype=np.float64).reshape(-1, 4)
+        self.bucket_size = bucket_size
+        self._contents = defaultdict(dict)
+        self.rebuild(ids, boxes[:, :2], boxes[:, 2:])
+
+    def auto_tune(self, target_per_cell=4):
+        """
+        rebuckets using suggest_bucket_size for the current objects and returns the chosen size
+        """
+        if not self._bounds_for_object:
+            return self.bucket_size
+        boxes = np.array(list(self._bounds_for_object.values()), dtype=np.float64).reshape(-1, 4)
+        bucket_size = suggest_bucket_size(boxes[:, :2], boxes[:, 2:], target_per_cell)
+        if bucket_size != self.bucket_size:
+            self.rebucket(bucket_size)
+        return bucket_size
+
+    def debug(self):
+        print('--------------------------------------------------------')
+        print(self.stats())
+        print(f'{self._contents=}\n\t{len(self._contents)=}')
+        print(f'{self._buckets_for_object=}\n\t{len(self._buckets_for_object)=}')
+        print('--------------------------------------------------------')
+
+
+class HashGridSnapshot(HashGrid):
+    """
+    read only HashGrid, queries track duplicates in a set local to the query instead of the shared generation stamps,
+    so any number of threads can query the same snapshot at once
+    """
+
+    def _new_query(self):
+        return set()
+
+    def _iter_unique(self, cells, seen):
+        contents = self._contents
+        for coords in cells:
+            bucket = contents.get(coords)
+            if not bucket:
+                continue
             for obj in bucket:
                 if obj not in seen:
-                    yield obj
                     seen.add(obj)
+                    yield obj
+
+    def snapshot(self, copy=True):
+        """
+        a snapshot never changes, so it is its own snapshot, moving the contents out would empty it under its readers
+        """
+        return self
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} is read only')
+
+    add = add_all = rebuild = remove = update = update_cells = clear_bounds = clear_point = clear = rebucket = auto_tune = _read_only
+
+
+class DoubleBufferedHashGrid:
+    """
+    writers modify [back] while readers query [front], the HashGridSnapshot published by the last swap()
+
+    swap() publishes by rebinding [front] in a single assignment, a reader that grabbed the previous front keeps
+    querying a consistent view until it lets go of it, so the read path takes no locks
+
+    with [carry_over] True [back] keeps its contents after a swap for incremental updates (swap copies),
+    otherwise its contents are moved into the new front and every frame starts from an empty grid (swap is O(1))
+    """
+
+    def __init__(self, bucket_size=200, carry_over=True):
+        self.carry_over = carry_over
+        self.back = HashGrid(bucket_size)
+        self.front = self.back.snapshot()
+        self._swap_lock = threading.Lock()
+
+    def add(self, obj, bounds):
+        self.back.add(obj, bounds)
+
+    def add_all(self, *obj_bound_pairs):
+        self.back.add_all(*obj_bound_pairs)
+
+    def rebuild(self, ids, mins, maxs):
+        self.back.rebuild(ids, mins, maxs)
+
+    def remove(self, obj):
+        return self.back.remove(obj)
+
+    def update(self, obj, bounds):
+        return self.back.update(obj, bounds)
+
+    def update_cells(self, obj, bounds):
+        return self.back.update_cells(obj, bounds)
+
+    def clear(self):
+        self.back.clear()
+
+    def swap(self):
+        with self._swap_lock:
+            self.front = front = self.back.snapshot(copy=self.carry_over)
+        return front
+
+
+class MultiLevelHashGrid:
+    """
+    stack of HashGrids with bucket sizes growing by [factor] per level,
+    each object is stored only in the first level whose cells are at least as large as its bounds,
+    so every object covers at most 4 cells no matter its size, queries walk all levels
+    """
+
+    def __init__(self, bucket_size=200, levels=4, factor=4):
+        self.levels = [HashGrid(bucket_size * factor ** i) for i in range(levels)]
+        self._level_sizes = np.array([level.bucket_size for level in self.levels], dtype=np.float64)
+        self._level_for_object: dict[Hashable, HashGrid] = {}
+
+    def __len__(self):
+        return len(self._level_for_object)
+
+    def __contains__(self, obj):
+        return obj in self._level_for_object
+
+    def _level_index(self, extent):
+        return min(int(np.searchsorted(self._level_sizes, extent)), len(self.levels) - 1)
+
+    def level_for_bounds(self, bounds):
+        min_x, min_y, max_x, max_y = _normalize_bounds(bounds)
+        return self.levels[self._level_index(max(max_x - min_x, max_y - min_y))]
+
+    def add(self, obj, bounds):
+        if obj in self._level_for_object:
+            return self.update(obj, bounds)
+        level = self.level_for_bounds(bounds)
+        level.add(obj, bounds)
+        self._level_for_object[obj] = level
+
+    def add_all(self, *obj_bound_pairs):
+        for obj, bound in obj_bound_pairs:
+            self.add(obj, bound)
+
+    def rebuild(self, ids, mins, maxs):
+        ids, mins, maxs = _as_id_array(ids), np.asarray(mins), np.asarray(maxs)
+        extent = np.abs(maxs - mins).max(axis=1) if len(ids) else np.empty(0)
+        indices = np.minimum(np.searchsorted(self._level_sizes, extent), len(self.levels) - 1)
+        self._level_for_object = {}
+        for i, level in enumerate(self.levels):
+            mask = indices == i
+            level.rebuild(ids[mask], mins[mask], maxs[mask])
+            self._level_for_object.update(dict.fromkeys(ids[mask].tolist(), level))
+
+    def remove(self, obj):
+        level = self._level_for_object.pop(obj, None)
+        return level is not None and level.remove(obj)
+
+    def update(self, obj, bounds):
+        """
+        moves [obj] to [bounds], returns True if it was moved and False if it is not in the grid,
+        use update_cells to also find out whether the cells it covers changed
+        """
+        return self.update_cells(obj, bounds) is not None
+
+    def update_cells(self, obj, bounds):
+        """
+        same return values as HashGrid.update_cells, moving to another level counts as a footprint change
+        """
+        level = self._level_for_object.get(obj)
+        if level is None:
+            return None
+        new_level = self.level_for_bounds(bounds)
+        if new_level is level:
+            return level.update_cells(obj, bounds)
+        level.remove(obj)
+        new_level.add(obj, bounds)
+        self._level_for_object[obj] = new_level
+        return True
+
+    def to_bucket_coord(self, point, level=0):
+        return self.levels[level].to_bucket_coord(point)
+
+    def _forget_cleared(self, level, objects):
+        for obj in objects:
+            if obj not in level._buckets_for_object:
+                del self._level_for_object[obj]
+
+    def clear_bounds(self, bounds, filter_func=None):
+        for level in self.levels:
+            objects = level.get_objects_for_area(bounds)
+            level.clear_bounds(bounds, filter_func)
+            self._forget_cleared(level, objects)
+
+    def clear_point(self, point, filter_func=None):
+        for level in self.levels:
+            objects = list(level._contents.get(level.to_bucket_coord(point), ()))
+            level.clear_point(point, filter_func)
+            self._forget_cleared(level, objects)
+
+    def clear(self):
+        for level in self.levels:
+            level.clear()
+        self._level_for_object.clear()
+
+    def iter_objects_for_point(self, point):
+        for level in self.levels:
+            yield from level.iter_objects_for_point(point)
+
+    def iter_objects_for_area(self, bounds):
+        for level in self.levels:
+            yield from level.iter_objects_for_area(bounds)
+
+    def get_objects_for_point(self, point, out=None):
+        if out is None:
+            return set(self.iter_objects_for_point(point))
+        return _fill_out(out, self.iter_objects_for_point(point))
+
+    def get_objects_for_area(self, bounds, out=None):
+        if out is None:
+            return set(self.iter_objects_for_area(bounds))
+        return _fill_out(out, self.iter_objects_for_area(bounds))
+
+    def query_radius(self, center, r):
+        return set().union(*(level.query_radius(center, r) for level in self.levels))
+
+    def nearest(self, point, k=1, max_dist=inf):
+        x, y = float(point[0]), float(point[1])
+        candidates = [
+            (_box_distance(level._bounds_for_object[obj], x, y), obj)
+            for level in self.levels
+            for obj in level.nearest(point, k, max_dist)
+        ]
+        return [obj for _, obj in heapq.nsmallest(k, candidates, key=itemgetter(0))]
+
+    def raycast(self, origin, direction, max_dist):
+        return heapq.merge(*(level.raycast(origin, direction, max_dist) for level in self.levels), key=itemgetter(1))
+
+    def query_many(self, bounds):
+        ids, offsets = [], [0]
+        for topleft, bottomright in np.asarray(bounds).tolist():
+            ids.extend(self.iter_objects_for_area((topleft, bottomright)))
+            offsets.append(len(ids))
+        return _as_id_array(ids), np.array(offsets, dtype=np.intp)
+
+    def iter_candidate_pairs(self, exact=False):
+        """
+        yields every unordered pair of objects that share a bucket on some level, exactly once:
+        pairs within a level come from that level, and every object is queried against each coarser level
+        for the pairs it forms with the larger objects stored there
+
+        if [exact] is True pairs whose bounds do not overlap are dropped
+        """
+        for i, level in enumerate(self.levels):
+            yield from level.iter_candidate_pairs(exact)
+            coarser = self.levels[i + 1:]
+            if not coarser:
+                continue
+            for a, box in level._bounds_for_object.items():
+                area = (box[0], box[1]), (box[2], box[3])
+                for other in coarser:
+                    # materialized so the caller can query the grid between yields
+                    for b in other.get_objects_for_area(area):
+                        if not exact or _boxes_overlap(box, other._bounds_for_object[b]):
+                            yield a, b
+
+    def candidate_pairs_array(self, exact=False):
+        """
+        same pairs as iter_candidate_pairs as an (M, 2) array
+        """
+        return _as_id_array([obj for pair in self.iter_candidate_pairs(exact) for obj in pair]).reshape(-1, 2)
+
+    def get_all_objects(self):
+        for level in self.levels:
+            yield from level.get_all_objects()
+
+    def stats(self):
+        return [level.stats() for level in self.levels]
+
+    def debug(self):
+        for level in self.levels:
+            level.debug()
+
+
+def _pack_cells(cx, cy):
+    return (cx.astype(np.int64) << 32) | (cy.astype(np.int64) & 0xFFFFFFFF)
+
+
+def _unpack_cells(keys):
+    return keys >> 32, ((keys & 0xFFFFFFFF) ^ 0x80000000) - 0x80000000
+
+
+def _expand_ranges(starts, lengths):
+    """
+    returns the concatenation of arange(start, start + length) for every (start, length) pair
+    """
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.intp)
+    run_starts = np.cumsum(lengths) - lengths
+    return np.repeat(starts - run_starts, lengths) + np.arange(total)
+
+
+_FILE_MAGIC = b'HASHGRD1'
+# magic, id dtype, bucket size, objects, cells, cell entries
+_FILE_HEADER = struct.Struct('<8s8sdqqq')
+_FILE_ALIGN = 64
+
+
+class ArrayHashGrid:
+    """
+    HashGrid variant that keeps ids and bounds in contiguous numpy arrays
+
+    the cell index is rebuilt lazily in one vectorized pass the first time it is queried after a mutation,
+    queries are answered with searchsorted against the sorted cell keys
+    """
+
+    def __init__(self, bucket_size=200, capacity=1024, id_dtype=object):
+        self.bucket_size = bucket_size
+        self._ids = np.empty(capacity, dtype=id_dtype)
+        self._mins = np.empty((capacity, 2), dtype=np.float64)
+        self._maxs = np.empty((capacity, 2), dtype=np.float64)
+        self._size = 0
+        self._slot_map = {}
+        self._cell_keys = np.empty(0, dtype=np.int64)
+        self._cell_offsets = np.zeros(1, dtype=np.intp)
+        self._cell_slots = np.empty(0, dtype=np.intp)
+        self._dirty = False
+        self.reset_query_stats()
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, obj):
+        return obj in self._slot_for_object
+
+    @property
+    def _slot_for_object(self):
+        if self._slot_map is None:
+            self._slot_map = dict(zip(self._ids[:self._size].tolist(), range(self._size)))
+        return self._slot_map
+
+    def _reserve(self, needed):
+        """
+        grows the arrays to hold [needed] objects, read only arrays from load() are swapped for writable copies
+        """
+        capacity = len(self._ids)
+        if needed <= capacity and self._mins.flags.writeable:
+            return
+        while capacity < needed:
+            capacity = max(capacity * 2, 16)
+        for name in ('_ids', '_mins', '_maxs'):
+            old = getattr(self, name)
+            new = np.empty((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _set_bounds(self, slot, bounds):
+        (x1, y1), (x2, y2) = bounds[0], bounds[1]
+        self._mins[slot] = min(x1, x2), min(y1, y2)
+        self._maxs[slot] = max(x1, x2), max(y1, y2)
+
+    def add(self, obj, bounds):
+        if obj in self._slot_for_object:
+            return self.update(obj, bounds)
+        slot = self._size
+        self._reserve(slot + 1)
+        self._ids[slot] = obj
+        self._set_bounds(slot, bounds)
+        self._slot_for_object[obj] = slot
+        self._size += 1
+        self._dirty = True
+
+    def add_all(self, *obj_bound_pairs):
+        for obj, bound in obj_bound_pairs:
+            self.add(obj, bound)
+
+    def rebuild(self, ids, mins, maxs):
+        """
+        replaces the contents of the grid with [ids] and their bounds, reusing the existing arrays
+        """
+        ids, mins, maxs = np.asarray(ids), np.asarray(mins, dtype=np.float64), np.asarray(maxs, dtype=np.float64)
+        n = len(ids)
+        self.clear()
+        self._reserve(n)
+        self._ids[:n] = ids
+        np.minimum(mins, maxs, out=self._mins[:n])
+        np.maximum(mins, maxs, out=self._maxs[:n])
+        self._slot_map = None
+        self._size = n
+        self._dirty = True
+
+    def remove(self, obj):
+        slot = self._slot_for_object.pop(obj, None)
+        if slot is None:
+            return False
+        self._reserve(self._size)
+        last = self._size - 1
+        if slot != last:
+            moved = self._ids[last]
+            self._ids[slot] = moved
+            self._mins[slot] = self._mins[last]
+            self._maxs[slot] = self._maxs[last]
+            self._slot_for_object[moved] = slot
+        self._ids[last] = None if self._ids.dtype == object else self._ids[last]
+        self._size = last
+        self._dirty = True
+        return True
+
+    def update(self, obj, bounds):
+        """
+        moves [obj] to [bounds], returns True if it was moved and False if it is not in the grid,
+        use update_cells to also find out whether the cells it covers changed
+        """
+        return self.update_cells(obj, bounds) is not None
+
+    def update_cells(self, obj, bounds):
+        """
+        moves [obj] to [bounds], the cell index is only invalidated if the cells it covers changed
+
+        returns True if the cells covered by [obj] changed, False if they did not, and None if [obj] is not in the grid
+        """
+        slot = self._slot_for_object.get(obj)
+        if slot is None:
+            return None
+        self._reserve(self._size)
+        old_lo, old_hi = self._cell_bounds(self._mins[slot], self._maxs[slot])
+        self._set_bounds(slot, bounds)
+        lo, hi = self._cell_bounds(self._mins[slot], self._maxs[slot])
+        if np.array_equal(old_lo, lo) and np.array_equal(old_hi, hi):
+            return False
+        self._dirty = True
+        return True
+
+    def to_bucket_coord(self, point):
+        return int(point[0]) // self.bucket_size, int(point[1]) // self.bucket_size
+
+    def clear(self):
+        if self._ids.dtype == object:
+            self._ids[:self._size] = None
+        self._size = 0
+        self._slot_map = {}
+        self._dirty = True
+
+    def save(self, path):
+        """
+        writes the ids, bounds and the cell index (sorted keys, offsets, slots) to [path] as raw aligned arrays,
+        only grids with a numeric id_dtype can be saved
+        """
+        if self._ids.dtype == object:
+            raise TypeError(f'{type(self).__name__} with object ids cannot be saved, use a numeric id_dtype')
+        self.build_index()
+        n = self._size
+        arrays = (
+            self._ids[:n], self._mins[:n], self._maxs[:n],
+            self._cell_keys, self._cell_offsets.astype(np.int64), self._cell_slots.astype(np.int64),
+        )
+        with open(path, 'wb') as file:
+            file.write(_FILE_HEADER.pack(
+                _FILE_MAGIC, self._ids.dtype.str.encode(), self.bucket_size, n, len(self._cell_keys), len(self._cell_slots)
+            ))
+            for arr in arrays:
+                file.write(bytes(-file.tell() % _FILE_ALIGN))
+                file.write(np.ascontiguousarray(arr).tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        loads a grid written by save() without re-bucketing, with [mmap] the arrays are memory mapped read only
+        and only copied the first time the grid is modified
+        """
+        raw = np.memmap(path, dtype=np.uint8, mode='r') if mmap else np.fromfile(path, dtype=np.uint8)
+        magic, id_dtype, bucket_size, n, cells, entries = _FILE_HEADER.unpack(bytes(raw[:_FILE_HEADER.size]))
+        if magic != _FILE_MAGIC:
+            raise ValueError(f'{path} is not a saved {cls.__name__}')
+        offset = _FILE_HEADER.size
+
+        def take(dtype, *shape):
+            nonlocal offset
+            offset += -offset % _FILE_ALIGN
+            dtype = np.dtype(dtype)
+            nbytes = dtype.itemsize * int(np.prod(shape))
+            arr = raw[offset:offset + nbytes].view(dtype).reshape(shape)
+            offset += nbytes
+            return arr
+
+        grid = cls(int(bucket_size) if bucket_size.is_integer() else bucket_size, capacity=0)
+        grid._ids = take(id_dtype.rstrip(b'\0').decode(), n)
+        grid._mins, grid._maxs = take(np.float64, n, 2), take(np.float64, n, 2)
+        grid._cell_keys = take(np.int64, cells)
+        grid._cell_offsets = take(np.int64, cells + 1).astype(np.intp, copy=False)
+        grid._cell_slots = take(np.int64, entries).astype(np.intp, copy=False)
+        grid._size = n
+        grid._slot_map = None
+        grid._dirty = False
+        return grid
+
+    def rebucket(self, bucket_size):
+        self.bucket_size = bucket_size
+        self._dirty = True
+
+    def auto_tune(self, target_per_cell=4):
+        """
+        rebuckets using suggest_bucket_size for the current objects and returns the chosen size
+        """
+        if not self._size:
+            return self.bucket_size
+        bucket_size = suggest_bucket_size(self._mins[:self._size], self._maxs[:self._size], target_per_cell)
+        self.rebucket(bucket_size)
+        return bucket_size
+
+    def _cell_bounds(self, mins, maxs):
+        return mins.astype(np.int64) // self.bucket_size, maxs.astype(np.int64) // self.bucket_size
+
+    def _build_index(self):
+        n = self._size
+        lo, hi = self._cell_bounds(self._mins[:n], self._maxs[:n])
+        heights = hi[:, 1] - lo[:, 1] + 1
+        counts = (hi[:, 0] - lo[:, 0] + 1) * heights
+        slots = np.repeat(np.arange(n), counts)
+        local = np.arange(len(slots)) - np.repeat(np.cumsum(counts) - counts, counts)
+        heights = heights[slots]
+        keys = _pack_cells(lo[slots, 0] + local // heights, lo[slots, 1] + local % heights)
+
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.intp)
+        self._cell_keys = keys[starts]
+        self._cell_offsets = np.r_[starts, len(keys)].astype(np.intp)
+        self._cell_slots = slots[order]
+        self._dirty = False
+
+    def build_index(self):
+        """
+        builds the cell index now if the grid changed since it was last built, queries otherwise build it on first use
+        """
+        if self._dirty:
+            self._build_index()
+
+    def _find_cells(self, keys):
+        """
+        returns the positions in the sorted cell index of the given keys, dropping keys that have no bucket
+        """
+        pos, found = self._lookup_cells(keys)
+        return pos[found]
+
+    def _lookup_cells(self, keys):
+        if not len(self._cell_keys):
+            return np.zeros(len(keys), dtype=np.intp), np.zeros(len(keys), dtype=bool)
+        pos = np.minimum(np.searchsorted(self._cell_keys, keys), len(self._cell_keys) - 1)
+        return pos, self._cell_keys[pos] == keys
+
+    def _cells_in_area(self, lo, hi):
+        width, height = hi[0] - lo[0] + 1, hi[1] - lo[1] + 1
+        if width * height > len(self._cell_keys):
+            cx, cy = _unpack_cells(self._cell_keys)
+            return np.flatnonzero((cx >= lo[0]) & (cx <= hi[0]) & (cy >= lo[1]) & (cy <= hi[1]))
+        cx, cy = np.meshgrid(np.arange(lo[0], hi[0] + 1), np.arange(lo[1], hi[1] + 1), indexing='ij')
+        return self._find_cells(_pack_cells(cx.ravel(), cy.ravel()))
+
+    def _slots_for_cells(self, cells):
+        starts = self._cell_offsets[cells]
+        return self._cell_slots[_expand_ranges(starts, self._cell_offsets[cells + 1] - starts)]
+
+    def _area_slots(self, bounds):
+        self.build_index()
+        (x1, y1), (x2, y2) = bounds[0], bounds[1]
+        lo, hi = self._cell_bounds(np.array([min(x1, x2), min(y1, y2)]), np.array([max(x1, x2), max(y1, y2)]))
+        return self._count_query(self._slots_for_cells(self._cells_in_area(lo, hi)))
+
+    def _count_query(self, candidates, queries=1):
+        unique = np.unique(candidates)
+        self._queries += queries
+        self._query_candidates += len(candidates)
+        self._query_unique += len(unique)
+        return unique
+
+    def iter_objects_for_point(self, point):
+        return self.iter_objects_for_area((point, point))
+
+    def iter_objects_for_area(self, bounds):
+        return iter(self._ids[self._area_slots(bounds)].tolist())
+
+    def get_objects_for_point(self, point, out=None):
+        return self.get_objects_for_area((point, point), out)
+
+    def get_objects_for_area(self, bounds, out=None):
+        """
+        returns a new set, or writes the ids into [out] and returns it:
+        a list is cleared and refilled, a numpy array is filled from the start and the used view is returned
+        """
+        ids = self._ids[self._area_slots(bounds)]
+        if out is None:
+            return set(ids.tolist())
+        return _fill_out(out, ids)
+
+    def query_many(self, bounds):
+        """
+        answers an (N, 2, 2) array of query boxes in one vectorized pass,
+        returns (ids, offsets) where the objects found for query i are ids[offsets[i]:offsets[i + 1]]
+        """
+        self.build_index()
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 2, 2)
+        lo, hi = self._cell_bounds(bounds.min(axis=1), bounds.max(axis=1))
+        heights = hi[:, 1] - lo[:, 1] + 1
+        counts = (hi[:, 0] - lo[:, 0] + 1) * heights
+        # boxes covering more cells than are occupied filter the occupied cells instead of enumerating their own
+        large = counts > len(self._cell_keys)
+        counts = np.where(large, 0, counts)
+        query = np.repeat(np.arange(len(bounds)), counts)
+        local = np.arange(len(query)) - np.repeat(np.cumsum(counts) - counts, counts)
+        heights = heights[query]
+        pos, found = self._lookup_cells(_pack_cells(lo[query, 0] + local // heights, lo[query, 1] + local % heights))
+        query, pos = query[found], pos[found]
+
+        if large.any():
+            large_query = np.flatnonzero(large)
+            large_pos = [self._cells_in_area(lo[i], hi[i]) for i in large_query.tolist()]
+            query = np.concatenate([query, np.repeat(large_query, [len(cells) for cells in large_pos])])
+            pos = np.concatenate([pos, *large_pos]).astype(np.intp)
+
+        starts = self._cell_offsets[pos]
+        lengths = self._cell_offsets[pos + 1] - starts
+        pairs = self._count_query(np.repeat(query, lengths).astype(np.int64) * max(self._size, 1)
+                                  + self._cell_slots[_expand_ranges(starts, lengths)], len(bounds))
+        query, slots = np.divmod(pairs, max(self._size, 1))
+        offsets = np.searchsorted(query, np.arange(len(bounds) + 1)).astype(np.intp)
+        return self._ids[slots], offsets
+
+    def candidate_pairs_array(self, exact=False):
+        """
+        returns an (M, 2) array with every unordered pair of ids that share a bucket, each pair exactly once,
+        pairs are generated per cell in bulk and only kept in the first cell both objects cover
+
+        if [exact] is True pairs whose bounds do not overlap are dropped
+        """
+        self.build_index()
+        sizes = np.diff(self._cell_offsets)
+        cell_of_entry = np.repeat(np.arange(len(sizes)), sizes)
+        entry = np.arange(len(self._cell_slots))
+        later = self._cell_offsets[cell_of_entry + 1] - entry - 1
+        first = np.repeat(entry, later)
+        second = _expand_ranges(entry + 1, later)
+        a, b = self._cell_slots[first], self._cell_slots[second]
+
+        cx, cy = _unpack_cells(self._cell_keys[cell_of_entry[first]])
+        lo = self._mins[:self._size].astype(np.int64) // self.bucket_size
+        keep = (np.maximum(lo[a, 0], lo[b, 0]) == cx) & (np.maximum(lo[a, 1], lo[b, 1]) == cy)
+        if exact:
+            keep &= np.all((self._mins[a] <= self._maxs[b]) & (self._mins[b] <= self._maxs[a]), axis=1)
+        return np.stack((self._ids[a[keep]], self._ids[b[keep]]), axis=1)
+
+    def iter_candidate_pairs(self, exact=False):
+        yield from map(tuple, self.candidate_pairs_array(exact).tolist())
+
+    def raycast(self, origin, direction, max_dist):
+        """
+        yields (id, distance) for every object whose bounds the ray hits within [max_dist], nearest hit first,
+        the cells on the ray are found with a DDA traversal and all their objects are slab tested in one pass
+        """
+        ox, oy, dx, dy = _normalize_ray(origin, direction, max_dist)
+        self.build_index()
+        cells = np.array([coords for coords, _ in _iter_ray_cells(ox, oy, dx, dy, max_dist, self.bucket_size)])
+        slots = self._count_query(self._slots_for_cells(self._find_cells(_pack_cells(cells[:, 0], cells[:, 1]))))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            direction = np.array([dx, dy])
+            near = (self._mins[slots] - (ox, oy)) / direction
+            far = (self._maxs[slots] - (ox, oy)) / direction
+        inside = (self._mins[slots] <= (ox, oy)) & ((ox, oy) <= self._maxs[slots])
+        parallel = direction == 0
+        enter = np.where(parallel, np.where(inside, -inf, inf), np.minimum(near, far))
+        leave = np.where(parallel, np.where(inside, inf, -inf), np.maximum(near, far))
+        enter, leave = np.maximum(enter.max(axis=1), 0), leave.min(axis=1)
+        hit = (enter <= leave) & (enter <= max_dist)
+
+        order = np.argsort(enter[hit], kind='stable')
+        yield from zip(self._ids[slots[hit][order]].tolist(), enter[hit][order].tolist())
+
+    def _distances(self, slots, x, y):
+        dx = np.maximum(np.maximum(self._mins[slots, 0] - x, x - self._maxs[slots, 0]), 0)
+        dy = np.maximum(np.maximum(self._mins[slots, 1] - y, y - self._maxs[slots, 1]), 0)
+        return np.hypot(dx, dy)
+
+    def query_radius(self, center, r):
+        """
+        returns the objects whose bounds are within [r] of [center]
+        """
+        x, y = float(center[0]), float(center[1])
+        slots = self._area_slots(((x - r, y - r), (x + r, y + r)))
+        return set(self._ids[slots[self._distances(slots, x, y) <= r]].tolist())
+
+    def nearest(self, point, k=1, max_dist=inf):
+        """
+        returns up to [k] objects ordered by the distance from [point] to their bounds,
+        the searched square doubles in size until the k-th best distance fits inside it
+        """
+        if not self._size or k < 1:
+            return []
+        x, y = float(point[0]), float(point[1])
+        n = self._size
+        reach = max(abs(self._mins[:n] - (x, y)).max(), abs(self._maxs[:n] - (x, y)).max()) + self.bucket_size
+        half = float(self.bucket_size)
+        while True:
+            half = min(half, reach, max_dist)
+            slots = self._area_slots(((x - half, y - half), (x + half, y + half)))
+            dists = self._distances(slots, x, y)
+            keep = dists <= max_dist
+            slots, dists = slots[keep], dists[keep]
+            if half >= min(reach, max_dist) or (len(dists) >= k and np.partition(dists, k - 1)[k - 1] <= half - 1):
+                break
+            half *= 2
+
+        order = np.argsort(dists, kind='stable')[:k]
+        return self._ids[slots[order]].tolist()
+
+    def get_all_objects(self):
+        yield from self._ids[:self._size].tolist()
+
+    def reset_query_stats(self):
+        self._queries = self._query_candidates = self._query_unique = 0
+
+    def stats(self):
+        """
+        same HashGridStats as HashGrid.stats, the histograms are read off the cell index
+        """
+        self.build_index()
+        lo, hi = self._cell_bounds(self._mins[:self._size], self._maxs[:self._size])
+        return HashGridStats(
+            bucket_size=self.bucket_size,
+            objects=self._size,
+            occupied_cells=len(self._cell_keys),
+            objects_per_cell=Counter(np.diff(self._cell_offsets).tolist()),
+            cells_per_object=Counter(np.prod(hi - lo + 1, axis=1).tolist()),
+            queries=self._queries,
+            query_candidates=self._query_candidates,
+            query_unique=self._query_unique,
+        )
 
     def debug(self):
+        self.build_index()
         print('--------------------------------------------------------')
-        print(f'{self._contents=}\n\t{len(self._contents)=}')
-        print(f'{self._buckets_for_object=}\n\t{len(self._buckets_for_object)=}')
+        print(self.stats())
+        print(f'{self._size=}\n\t{len(self._cell_keys)=}\n\t{len(self._cell_slots)=}')
         print('--------------------------------------------------------')
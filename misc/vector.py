@@ -1,15 +1,103 @@
-from functools import lru_cache
+import threading
+from collections import OrderedDict
+from numbers import Real
 
 import numpy as np
 
 
+class VectorCache:
+    """
+    LRU interning of immutable vectors keyed on (cls, x, y), with hit / miss / eviction counters
+
+    [enabled] False turns interning off entirely, [capacity] bounds the number of cached vectors and
+    [quantize] snaps coordinates to multiples of that step before lookup, so nearby float coordinates share an entry,
+    note that the returned vector then holds the snapped coordinates
+
+    lookups and evictions share a lock so vectors can be created from several threads, like the lru_cache it replaces
+    """
+
+    def __init__(self, capacity=100, enabled=True, quantize=None):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.quantize = quantize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def intern(self, cls, x, y, factory):
+        if not self.enabled:
+            return factory(cls, x, y)
+        if self.quantize:
+            x, y = round(x / self.quantize) * self.quantize, round(y / self.quantize) * self.quantize
+
+        key = cls, x, y
+        entries = self._entries
+        with self._lock:
+            vector = entries.get(key)
+            if vector is not None:
+                entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            self.misses += 1
+            vector = entries[key] = factory(cls, x, y)
+            self._evict()
+            return vector
+
+    def configure(self, capacity=None, enabled=None, quantize=...):
+        """
+        changes the settings given, shrinking [capacity] evicts the least recently used vectors,
+        changing [quantize] clears the cache since existing entries were keyed with the old step
+        """
+        with self._lock:
+            if capacity is not None:
+                self.capacity = capacity
+            if enabled is not None:
+                self.enabled = enabled
+            if quantize is not ... and quantize != self.quantize:
+                self.quantize = quantize
+                self._entries.clear()
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        return self.hits / max(self.hits + self.misses, 1)
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+        }
+
+
+def _new_vector(cls, x, y):
+    arr = np.asarray([x, y], dtype=np.float64).view(cls)
+    arr.setflags(write=False)
+    return arr
+
+
 class Vector(np.ndarray):
-    @staticmethod
-    @lru_cache(maxsize=100)
     def __new__(cls, x: float, y: float) -> 'Vector':
-        arr: Vector = np.asarray([x, y], dtype=np.float64).view(cls)
-        arr.setflags(write=False)
-        return arr
+        return vector_cache.intern(cls, x, y, _new_vector)
 
     def tuplef(self):
         return tuple(self)
@@ -83,3 +171,291 @@ class Vector(np.ndarray):
 
     def __eq__(self, other):
         return np.array_equal(self, other)
+
+
+vector_cache = VectorCache(capacity=100)
+
+
+def _components(other):
+    if type(other) is FastVector:
+        return other.xf, other.yf
+    if isinstance(other, Real):
+        return other, other
+    return other[0], other[1]
+
+
+class FastVector:
+    """
+    plain float 2d vector with the same methods as Vector, without numpy dispatch or the lru_cache on creation,
+    meant for per frame scalar math where Vector's ndarray overhead dominates
+    """
+    __slots__ = ('xf', 'yf')
+    # numpy scalars and arrays on the left hand side defer to the reflected operators below instead of broadcasting
+    __array_ufunc__ = None
+
+    def __init__(self, x: float, y: float):
+        self.xf = float(x)
+        self.yf = float(y)
+
+    def tuplef(self):
+        return self.xf, self.yf
+
+    def tuple(self):
+        return self.x, self.y
+
+    def move_rel(self, x=0, y=0) -> 'FastVector':
+        return FastVector(self.xf + x, self.yf + y)
+
+    def is_zero(self, tolerance=.01):
+        return abs(self.xf) <= tolerance and abs(self.yf) <= tolerance
+
+    def is_near(self, other, tolerance=.01):
+        ox, oy = _components(other)
+        return abs(ox - self.xf) <= tolerance and abs(oy - self.yf) <= tolerance
+
+    def abs_diff(self, other):
+        ox, oy = _components(other)
+        return abs(ox - self.xf) + abs(oy - self.yf)
+
+    def abs_diff_tuple(self, other):
+        ox, oy = _components(other)
+        return FastVector(abs(ox - self.xf), abs(oy - self.yf))
+
+    def copy(self, x=None, y=None):
+        return FastVector(self.x if x is None else x, self.y if y is None else y)
+
+    @property
+    def x(self):
+        return int(self.xf)
+
+    @property
+    def y(self):
+        return int(self.yf)
+
+    @property
+    def length(self):
+        return (self.xf ** 2 + self.yf ** 2) ** .5
+
+    @property
+    def normalized(self):
+        # a zero vector gives nan components, same as Vector
+        length = self.length or float('nan')
+        return FastVector(self.xf / length, self.yf / length)
+
+    def __add__(self, other):
+        ox, oy = _components(other)
+        return FastVector(self.xf + ox, self.yf + oy)
+
+    def __sub__(self, other):
+        ox, oy = _components(other)
+        return FastVector(self.xf - ox, self.yf - oy)
+
+    def __mul__(self, other):
+        ox, oy = _components(other)
+        return FastVector(self.xf * ox, self.yf * oy)
+
+    def __truediv__(self, other):
+        ox, oy = _components(other)
+        return FastVector(self.xf / ox, self.yf / oy)
+
+    def __floordiv__(self, other):
+        ox, oy = _components(other)
+        return FastVector(self.xf // ox, self.yf // oy)
+
+    def __mod__(self, other):
+        ox, oy = _components(other)
+        return FastVector(self.xf % ox, self.yf % oy)
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def __rsub__(self, other):
+        ox, oy = _components(other)
+        return FastVector(ox - self.xf, oy - self.yf)
+
+    def __neg__(self):
+        return FastVector(-self.xf, -self.yf)
+
+    def __abs__(self):
+        return FastVector(abs(self.xf), abs(self.yf))
+
+    def __iter__(self):
+        yield self.xf
+        yield self.yf
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return (self.xf, self.yf)[index]
+
+    def __hash__(self):
+        return hash(self.tuple())
+
+    def __eq__(self, other):
+        try:
+            return (self.xf, self.yf) == _components(other)
+        except (TypeError, IndexError):
+            return NotImplemented
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.xf}, {self.yf})'
+
+
+def _as_points(other):
+    if isinstance(other, VectorArray):
+        return other.data
+    if isinstance(other, FastVector):
+        return np.array(other.tuplef())
+    return np.asarray(other, dtype=np.float64)
+
+
+def lengths(points):
+    """
+    length of every row of an (N, 2) array, same values as Vector.length
+    """
+    points = _as_points(points)
+    return np.sqrt(points[..., 0] ** 2 + points[..., 1] ** 2)
+
+
+def distances(points, others):
+    """
+    distance from every row of [points] to [others], which is a single point or an (N, 2) array matched row by row
+    """
+    return lengths(_as_points(others) - _as_points(points))
+
+
+def pairwise_distances(points, others):
+    """
+    (N, M) matrix of the distances between every row of [points] and every row of [others]
+    """
+    return lengths(_as_points(points)[:, None, :] - _as_points(others)[None, :, :])
+
+
+def normalize_all(points):
+    """
+    every row scaled to length 1, zero rows become nan like Vector.normalized
+    """
+    points = _as_points(points)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return points / lengths(points)[..., None]
+
+
+def near_mask(points, others, tolerance=.01):
+    """
+    True for every row within [tolerance] of [others] on both axes, same test as Vector.is_near
+    """
+    return np.all(np.abs(_as_points(others) - _as_points(points)) <= tolerance, axis=-1)
+
+
+def abs_diffs(points, others):
+    """
+    manhattan distance from every row to [others], same values as Vector.abs_diff
+    """
+    return np.abs(_as_points(others) - _as_points(points)).sum(axis=-1)
+
+
+def abs_diff_tuples(points, others):
+    """
+    per axis absolute differences, same values as Vector.abs_diff_tuple
+    """
+    return np.abs(_as_points(others) - _as_points(points))
+
+
+def bounding_box(points):
+    """
+    ((min_x, min_y), (max_x, max_y)) of a point set, usable directly as hash grid bounds
+    """
+    points = _as_points(points).reshape(-1, 2)
+    return tuple(points.min(axis=0).tolist()), tuple(points.max(axis=0).tolist())
+
+
+class VectorArray:
+    """
+    N vectors stored as one (N, 2) float array, the batch counterpart of Vector and FastVector
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float64).reshape(-1, 2)
+
+    @classmethod
+    def from_xy(cls, xs, ys):
+        return cls(np.column_stack((xs, ys)))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return FastVector(*self.data[index].tolist())
+        return VectorArray(self.data[index])
+
+    def __iter__(self):
+        return (FastVector(x, y) for x, y in self.data.tolist())
+
+    def tuples(self):
+        return [(int(x), int(y)) for x, y in self.data.tolist()]
+
+    def move_rel(self, x=0, y=0) -> 'VectorArray':
+        return VectorArray(self.data + (x, y))
+
+    @property
+    def x(self):
+        return self.data[:, 0].astype(int)
+
+    @property
+    def y(self):
+        return self.data[:, 1].astype(int)
+
+    @property
+    def xf(self):
+        return self.data[:, 0]
+
+    @property
+    def yf(self):
+        return self.data[:, 1]
+
+    @property
+    def length(self):
+        return lengths(self.data)
+
+    @property
+    def normalized(self):
+        return VectorArray(normalize_all(self.data))
+
+    def is_zero(self, tolerance=.01):
+        return near_mask(self.data, (0, 0), tolerance)
+
+    def is_near(self, other, tolerance=.01):
+        return near_mask(self.data, other, tolerance)
+
+    def abs_diff(self, other):
+        return abs_diffs(self.data, other)
+
+    def abs_diff_tuple(self, other):
+        return VectorArray(abs_diff_tuples(self.data, other))
+
+    def distances(self, other):
+        return distances(self.data, other)
+
+    def bounding_box(self):
+        return bounding_box(self.data)
+
+    def __add__(self, other):
+        return VectorArray(self.data + _as_points(other))
+
+    def __sub__(self, other):
+        return VectorArray(self.data - _as_points(other))
+
+    def __mul__(self, other):
+        return VectorArray(self.data * _as_points(other))
+
+    def __truediv__(self, other):
+        return VectorArray(self.data / _as_points(other))
+
+    def __neg__(self):
+        return VectorArray(-self.data)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.data!r})'